@@ -39,4 +39,7 @@ const PatientSchema = new mongoose.Schema(
   { timestamps: true }
 );
 
+// Admin search matches Name by prefix
+PatientSchema.index({ Name: 1 });
+
 module.exports = mongoose.model("Patient", PatientSchema);
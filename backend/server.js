@@ -118,12 +118,72 @@ app.get("/api/patients/:id", async (req, res) => {
 });
 
 // =====================================================
-// 🔒 ADMIN – GET ALL PATIENTS
+// 🔒 ADMIN – LIST PATIENTS (CURSOR PAGINATED)
 // =====================================================
+// GET /api/patients?limit=50&cursor=<Patient_ID>&q=<search>&fields=full
+// Pages walk the unique Patient_ID index, so any page costs the same
+// however many patients exist. Summary fields only unless fields=full.
+// q is a prefix: of Patient_ID as typed, or of Name in any case.
+// total is only sent with the first page (no cursor), null after it.
+const PATIENT_PAGE_SIZE = 50;
+const PATIENT_PAGE_MAX = 200;
+const PATIENT_SUMMARY_FIELDS = {
+  _id: 0,
+  Patient_ID: 1,
+  Name: 1,
+  Blood_Type: 1,
+  Gender: 1,
+  Emergency_Status: 1
+};
+
+const escapeRegex = text => text.replace(/[.*+?^${}()|[\]\\]/g, "\\$&");
+
 app.get("/api/patients", adminAuth, async (req, res) => {
   try {
-    const patients = await Patient.find();
-    res.json({ patients });
+    const limit = Math.min(
+      Math.max(parseInt(req.query.limit, 10) || PATIENT_PAGE_SIZE, 1),
+      PATIENT_PAGE_MAX
+    );
+
+    const filter = {};
+    if (req.query.q) {
+      // Anchored so both clauses stay on their indexes: a case-sensitive
+      // prefix is a range scan of Patient_ID, the Name one scans keys only
+      const q = escapeRegex(String(req.query.q));
+      filter.$or = [
+        { Patient_ID: new RegExp(`^${q}`) },
+        { Name: new RegExp(`^${q}`, "i") }
+      ];
+    }
+
+    // Counting matches visits every one of them, so only the first page
+    // pays for it; clients keep that total while paging
+    let total = null;
+    if (!req.query.cursor) {
+      total = req.query.q
+        ? await Patient.countDocuments(filter)
+        : await Patient.estimatedDocumentCount();
+    }
+
+    if (req.query.cursor) {
+      filter.Patient_ID = { $gt: String(req.query.cursor) };
+    }
+
+    const projection = req.query.fields === "full" ? null : PATIENT_SUMMARY_FIELDS;
+
+    const patients = await Patient.find(filter, projection)
+      .sort({ Patient_ID: 1 })
+      .limit(limit + 1)
+      .lean();
+
+    const hasMore = patients.length > limit;
+    if (hasMore) patients.pop();
+
+    res.json({
+      patients,
+      next_cursor: hasMore ? patients[patients.length - 1].Patient_ID : null,
+      total
+    });
   } catch {
     res.status(500).json({ error: "Failed to fetch patients" });
   }
@@ -170,6 +230,38 @@ app.get("/api/records/:patientId", async (req, res) => {
   }
 });
 
+// 🔒 ADMIN – RECORD METADATA FOR MANY PATIENTS (ONE QUERY)
+// POST /api/records/batch  { "patient_ids": ["P1", "P2", ...] }
+// → { "records": { "P1": [...], "P2": [] } }, one $in on the
+// indexed Patient_ID. At most one listing page of IDs per call.
+app.post("/api/records/batch", adminAuth, async (req, res) => {
+  try {
+    const ids = req.body && req.body.patient_ids;
+    if (!Array.isArray(ids)) {
+      return res.status(400).json({ error: "patient_ids array required" });
+    }
+    if (ids.length > PATIENT_PAGE_MAX) {
+      return res
+        .status(400)
+        .json({ error: `At most ${PATIENT_PAGE_MAX} patient_ids per request` });
+    }
+
+    const patientIds = [...new Set(ids.map(String))];
+    const records = await MedicalRecord.find(
+      { Patient_ID: { $in: patientIds } },
+      { File_Data: 0 }
+    ).lean();
+
+    const grouped = {};
+    patientIds.forEach(pid => { grouped[pid] = []; });
+    records.forEach(r => grouped[r.Patient_ID].push(r));
+
+    res.json({ records: grouped });
+  } catch {
+    res.status(500).json({ error: "Fetch failed" });
+  }
+});
+
 app.get("/api/records/download/:id", async (req, res) => {
   try {
     const record = await MedicalRecord.findById(req.params.id);
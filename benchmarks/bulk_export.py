@@ -0,0 +1,82 @@
+"""
+Bulk summary-PDF export throughput and memory.
+
+Usage (from the repo root):
+    python -m benchmarks.bulk_export --patients 10000 --workers 1 2 4
+
+Runs utils.bulk_export exports of synthetic patients and prints PDFs/s,
+total ZIP size and part count, and the parent's peak RSS, which should
+not grow with the number of patients. --cancel-after N also checks that cancelling after
+N PDFs stops the export and leaves no ZIP behind.
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from utils.bulk_export import ExportJobs
+
+BLOOD_TYPES = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+
+
+def make_patients(count):
+    """
+    Generator, so the export never sees the whole list at once.
+    """
+    for i in range(count):
+        yield {
+            "Patient_ID": f"P{100000 + i}",
+            "Name": f"Patient {i}",
+            "Date_of_Birth": "1980-01-01",
+            "Gender": "Female" if i % 2 else "Male",
+            "Blood_Type": BLOOD_TYPES[i % len(BLOOD_TYPES)],
+            "Current_Medications": "Metformin 500 mg" if i % 3 else "",
+            "Emergency_Status": "Diabetic" if i % 5 == 0 else "",
+            "Emergency_Contacts": "+91 98400 00000",
+        }
+
+
+def wait(jobs, job_id, cancel_after=None):
+    while True:
+        job = jobs.get(job_id)
+        if job["status"] != "running":
+            return job
+        if cancel_after is not None and job["done"] >= cancel_after:
+            jobs.cancel(job_id)
+            cancel_after = None
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--cancel-after", type=int)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'PDFs/s':>8} {'ZIP MB':>8} {'parts':>6} "
+          f"{'peak RSS MB':>12}  status")
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            jobs = ExportJobs(workers=workers, export_dir=tmp)
+
+            start = time.perf_counter()
+            job_id = jobs.start(make_patients(args.patients), total=args.patients)
+            job = wait(jobs, job_id, args.cancel_after)
+            elapsed = time.perf_counter() - start
+
+            size = sum(os.path.getsize(path) for path in job["paths"]) / 1e6
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"{workers:>7} {job['done'] / elapsed:>8.0f} {size:>8.1f} "
+                  f"{len(job['paths']):>6} {peak:>12.0f}  {job['status']} "
+                  f"({job['done']}/{job['total']}, {job['failed']} failed)")
+
+            if job["status"] == "cancelled":
+                leftovers = [f for f in os.listdir(tmp) if f.startswith(job_id)]
+                print(f"        leftover files after cancel: {leftovers or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
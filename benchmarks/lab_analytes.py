@@ -0,0 +1,181 @@
+"""
+Lab-analyte matcher: one automaton scan vs one regex per analyte.
+
+Usage (from the repo root):
+    python -m benchmarks.lab_analytes --analytes 300 --lines 1000 10000
+    python -m benchmarks.lab_analytes --check   # exit 1 if OCR drops values
+
+Pads the real dictionary with synthetic analytes up to --analytes
+entries, then times AnalyteMatcher.find() against the naive approach
+(a compiled regex per alias, each searching the whole text). The
+automaton's time should barely move with dictionary size.
+
+--check passes a sample report through the "fast" OCR profile's
+character whitelist (characters outside it are dropped, as Tesseract
+never emits them) and fails if that changes what lab_analytes extracts
+or if any unit the parser knows needs a character the whitelist lacks.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from utils.file_parser import LAB_REPORT_WHITELIST
+from utils.lab_analytes import (
+    ANALYTES,
+    UNITS,
+    VALUE_RE,
+    AnalyteMatcher,
+    extract_lab_results,
+)
+
+SYLLABLES = ["cal", "tro", "phen", "zyme", "lin", "ase", "glo", "mer",
+             "chol", "tin", "ox", "ferr", "lact", "ide", "nor", "pro"]
+
+NOISE = [
+    "CITY DIAGNOSTICS LABORATORY  Ph: 044-2345 6789",
+    "Test Name            Result     Units     Ref. Range",
+    "Sample collected on 12/01/2025 at 08:30",
+    "",
+    "Page 3 of 9  -- Electronically verified report --",
+]
+
+
+def make_dictionary(size, seed=0):
+    rng = random.Random(seed)
+    analytes = dict(ANALYTES)
+    while len(analytes) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        canonical = word.capitalize()
+        if canonical not in analytes:
+            analytes[canonical] = [word, "serum " + word, word + " level"]
+    return analytes
+
+
+def make_text(analytes, lines, seed=0):
+    rng = random.Random(seed)
+    names = [aliases[0] for aliases in analytes.values()]
+    body = []
+    for _ in range(lines):
+        if rng.random() < 0.5:
+            name = rng.choice(names).title()
+            body.append(f"{name:<22} {rng.uniform(1, 300):.1f}   mg/dl   ref")
+        else:
+            body.append(rng.choice(NOISE))
+    return "\n".join(body)
+
+
+SAMPLE_REPORT = """\
+Hemoglobin           13.5     g/dl      13.0 - 17.0
+Total WBC Count      7.2      10^3/ul   4.0 - 11.0
+Platelet Count       250      10^3/ul   150 - 450
+Serum Creatinine     88       µmol/l    62 - 106
+HbA1c = 6.1 %
+Vitamin B12          <150     pg/ml
+TSH                  >100     uiu/ml
+Ferritin             < 15     ng/ml
+Tota1 Cho1esterol    182      mg/dl
+"""
+
+# Values the sample must give whatever the whitelist does: a spaced
+# comparator, and a label with two OCR confusions at separate positions
+SAMPLE_EXPECTED = {
+    "Ferritin": ("<15", "ng/ml"),
+    "Total_Cholesterol": ("182", "mg/dl"),
+}
+
+
+def check():
+    ok = True
+
+    allowed = set(LAB_REPORT_WHITELIST)
+    missing = sorted({c for u in UNITS for c in u if c not in allowed and c != " "}
+                     | {c for c in "<>=" if c not in allowed})
+    if missing:
+        print(f"FAIL whitelist lacks characters the parser reads: {missing}")
+        ok = False
+
+    ocr_text = "".join(c for c in SAMPLE_REPORT if c in allowed or c.isspace())
+    expected = extract_lab_results(SAMPLE_REPORT)
+    found = extract_lab_results(ocr_text)
+
+    for analyte, value in expected.items():
+        got = found.get(analyte)
+        status = "ok  " if got == value else "FAIL"
+        ok = ok and got == value
+        print(f"{status} {analyte:<22} {value} -> {got}")
+
+    for analyte, value in SAMPLE_EXPECTED.items():
+        if expected.get(analyte) != value:
+            print(f"FAIL {analyte:<22} expected {value}, got {expected.get(analyte)}")
+            ok = False
+
+    if len(expected) < 9:
+        print(f"FAIL only {len(expected)} analytes found in the sample")
+        ok = False
+
+    return ok
+
+
+def naive_find(patterns, text):
+    results = {}
+    for canonical, pattern in patterns:
+        if canonical in results:
+            continue
+        for match in pattern.finditer(text):
+            value = VALUE_RE.match(text, match.end())
+            if value:
+                comparator, number, unit = value.groups()
+                results[canonical] = (comparator + number, unit or "")
+                break
+    return results
+
+
+def best_of(repeats, fn):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--analytes", type=int, default=300)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check() else 1)
+
+    analytes = make_dictionary(args.analytes)
+
+    start = time.perf_counter()
+    matcher = AnalyteMatcher(analytes)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    patterns = [
+        (canonical, re.compile(r"\b" + re.escape(alias) + r"\b", re.IGNORECASE))
+        for canonical, aliases in analytes.items()
+        for alias in aliases
+    ]
+
+    print(f"{len(analytes)} analytes, {len(patterns)} aliases, "
+          f"{len(matcher._goto)} automaton states, built in {build_ms:.1f} ms")
+    print(f"{'lines':>8} {'automaton ms':>13} {'regex ms':>10} "
+          f"{'speedup':>8} {'found':>6}")
+
+    for lines in args.lines:
+        text = make_text(analytes, lines)
+        fast, found = best_of(args.repeats, lambda: matcher.find(text))
+        slow, _ = best_of(args.repeats, lambda: naive_find(patterns, text))
+        print(f"{lines:>8} {fast * 1000:>13.1f} {slow * 1000:>10.1f} "
+              f"{slow / fast:>7.1f}x {len(found):>6}")
+
+
+if __name__ == "__main__":
+    main()
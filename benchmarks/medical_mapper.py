@@ -0,0 +1,66 @@
+"""
+map_medical_data scaling on large OCR outputs.
+
+Usage (from the repo root):
+    python -m benchmarks.medical_mapper --lines 1000 10000 100000 1000000
+
+Builds OCR-like noise of increasing size with the target fields near
+the end (worst case: every extractor scans almost the whole document)
+and prints time per line, which should stay flat as size grows.
+"""
+import argparse
+import random
+import time
+
+from utils.medical_mapper import map_medical_data
+
+NOISE = [
+    "CITY DIAGNOSTICS LABORATORY  Ph: 044-2345 6789",
+    "Test Name            Result     Units     Ref. Range",
+    "Serum Creatinine     0.9        mg/dl     0.6 - 1.2",
+    "TSH                  2.1        uIU/ml    0.4 - 4.0",
+    "Haemoglobin          13.6       g/dl      13 - 17",
+    "Total Cholesterol    182        mg/dl     < 200",
+    "Sample collected on 12/01/2025 at 08:30",
+    "",
+    "Page 3 of 9  -- Electronically verified report --",
+]
+
+FIELDS = [
+    "Mr. Arjun kumar",
+    "Hb A1c",
+    "Glycated haemoglobin",
+    "6.8 %",
+    "BLOOD SUGAR (FASTING) 126 mg/dl",
+    "Blood Group : B+ve",
+]
+
+
+def make_text(lines, seed=0):
+    rng = random.Random(seed)
+    body = [rng.choice(NOISE) for _ in range(max(0, lines - len(FIELDS)))]
+    return "\n".join(body + FIELDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--lines", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'lines':>9} {'ms':>9} {'us/line':>8}  fields")
+    for lines in args.lines:
+        text = make_text(lines)
+        best = float("inf")
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            data = map_medical_data(text)
+            best = min(best, time.perf_counter() - start)
+        print(f"{lines:>9} {best * 1000:>9.1f} {best / lines * 1e6:>8.2f}"
+              f"  {len(data)}")
+
+
+if __name__ == "__main__":
+    main()
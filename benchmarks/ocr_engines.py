@@ -0,0 +1,77 @@
+"""
+OCR throughput: pytesseract (process per call) vs the tesserocr pool.
+
+Usage (from the repo root; needs the tesseract binary, and tesserocr
+for the pool rows):
+    python -m benchmarks.ocr_engines --images 24 --threads 1 4
+
+Images are rendered and preprocessed once up front, so the rows only
+differ in how Tesseract is invoked. Each engine runs the same images
+through a thread pool of the given size and reports images/sec.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from benchmarks.ocr_preprocessing import make_fixture
+from utils.file_parser import (
+    OCR_POOL_SIZE,
+    PytesseractEngine,
+    TesserocrPool,
+    preprocess_image,
+    tesserocr,
+)
+
+
+def run(engine, images, threads, profile):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        texts = list(pool.map(
+            lambda image: engine.image_to_string(image, profile=profile),
+            images
+        ))
+    elapsed = time.perf_counter() - start
+    return len(images) / elapsed, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--threads", type=int, nargs="+",
+                        default=sorted({1, OCR_POOL_SIZE}))
+    parser.add_argument("--profile", default="default")
+    args = parser.parse_args()
+
+    images = []
+    for seed in range(args.images):
+        buffer, _ = make_fixture(seed)
+        image, _ = preprocess_image(Image.open(buffer))
+        images.append(image)
+
+    engines = [("pytesseract", PytesseractEngine)]
+    if tesserocr is None:
+        print("tesserocr not installed; pool rows skipped")
+    else:
+        engines.append(("tesserocr pool", TesserocrPool))
+
+    print(f"{'engine':<16} {'threads':>7} {'images/s':>9}")
+    for name, make_engine in engines:
+        for threads in args.threads:
+            engine = (
+                make_engine(size=threads) if make_engine is TesserocrPool
+                else make_engine()
+            )
+            # Warm-up: loads the pool's handles outside the timed run
+            run(engine, images[:threads], threads, args.profile)
+
+            rate, _ = run(engine, images, threads, args.profile)
+            print(f"{name:<16} {threads:>7} {rate:>9.2f}")
+
+            if hasattr(engine, "close"):
+                engine.close()
+
+
+if __name__ == "__main__":
+    main()
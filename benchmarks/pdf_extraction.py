@@ -0,0 +1,123 @@
+"""
+Serial vs parallel PDF text extraction.
+
+Usage (from the repo root):
+    python -m benchmarks.pdf_extraction --pages 10 50 150
+    python -m benchmarks.pdf_extraction --check   # exit 1 on mixed-PDF errors
+
+Generates multi-page lab-report style PDFs and times
+utils.file_parser.extract_pdf_text in both modes.
+
+--check extracts a PDF mixing text pages with a blank (scan-like) page
+in both modes: the text pages must come through whether OCR works on
+the blank page or fails there (no tesseract installed, say).
+"""
+import argparse
+import sys
+import time
+
+from fpdf import FPDF
+
+from utils.file_parser import PDF_WORKERS, extract_pdf_pages, extract_pdf_text
+
+REPORT_LINES = [
+    "BLOOD SUGAR (FASTING) 112 mg/dl",
+    "Hb A1c",
+    "Result 6.4 %",
+    "Serum Creatinine 0.9 mg/dl",
+    "TSH 2.1 uIU/ml",
+    "Total Cholesterol 182 mg/dl",
+    "Haemoglobin 13.6 g/dl",
+    "Platelet Count 2.4 lakhs/cumm",
+]
+
+
+def make_fixture(pages):
+    pdf = FPDF()
+    pdf.set_font("Arial", "", 11)
+    for n in range(pages):
+        pdf.add_page()
+        pdf.cell(0, 10, f"Discharge summary - page {n + 1}", ln=True)
+        for _ in range(6):
+            for line in REPORT_LINES:
+                pdf.cell(0, 5, line, ln=True)
+    return pdf.output(dest="S").encode("latin1")
+
+
+def make_mixed_fixture():
+    """
+    Text page, blank page (goes to OCR), text page.
+    """
+    pdf = FPDF()
+    pdf.set_font("Arial", "", 11)
+    for n in range(3):
+        pdf.add_page()
+        if n != 1:
+            for line in REPORT_LINES:
+                pdf.cell(0, 5, line, ln=True)
+    return pdf.output(dest="S").encode("latin1")
+
+
+def check():
+    data = make_mixed_fixture()
+    ok = True
+    for parallel in (False, True):
+        mode = "parallel" if parallel else "serial"
+        try:
+            pages = extract_pdf_pages(data, parallel=parallel)
+        except Exception as e:
+            print(f"FAIL {mode}: {type(e).__name__}: {e}")
+            ok = False
+            continue
+
+        methods = [page["method"] for page in pages]
+        text_ok = all(REPORT_LINES[0] in pages[i]["text"] for i in (0, 2))
+        passed = (
+            len(pages) == 3 and methods[0] == methods[2] == "text"
+            and methods[1] in ("ocr", "ocr_failed") and text_ok
+        )
+        print(f"{'ok' if passed else 'FAIL'} {mode}: methods {methods}")
+        ok = ok and passed
+    return ok
+
+
+def timed(fn, repeats):
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 150])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check() else 1)
+
+    # Start the pool outside the timed runs
+    extract_pdf_text(make_fixture(2), parallel=True)
+
+    print(f"{PDF_WORKERS} workers")
+    print(f"{'pages':>6} {'serial s':>9} {'parallel s':>11} {'speedup':>8}")
+    for pages in args.pages:
+        data = make_fixture(pages)
+        serial, serial_text = timed(
+            lambda: extract_pdf_text(data, parallel=False), args.repeats
+        )
+        parallel, parallel_text = timed(
+            lambda: extract_pdf_text(data, parallel=True), args.repeats
+        )
+        assert serial_text == parallel_text, "page order mismatch"
+        print(f"{pages:>6} {serial:>9.2f} {parallel:>11.2f} "
+              f"{serial / parallel:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
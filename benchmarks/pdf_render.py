@@ -0,0 +1,211 @@
+"""
+Emergency PDF rendering: per-call layout vs the cached page template.
+
+Usage (from the repo root):
+    python -m benchmarks.pdf_render --renders 50
+    python -m benchmarks.pdf_render --check    # exit 1 on visual drift
+
+"before" is a copy of the renderer as it was prior to the template
+(logo re-read and re-parsed by fpdf on every call). --check rasterizes
+both outputs with pdfium and requires them to match pixel for pixel,
+except inside the watermark box, which is now intentionally faded.
+It also checks that reusing the template across patients renders the
+same page as a freshly built template, and that the download path
+(cached_medical_pdf) returns the same PDF from its cache.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pypdfium2 as pdfium
+from fpdf import FPDF
+from PIL import ImageChops
+
+import utils.pdf_generator as pdf_generator
+from utils.pdf_cache import cached_medical_pdf, pdf_cache
+from utils.pdf_generator import LOGO_PATH, generate_medical_pdf
+from utils.qr_generator import generate_emergency_qr
+
+PATIENTS = [
+    {
+        "Patient_ID": "P1001", "Name": "Arjun Kumar",
+        "Date_of_Birth": "1984-02-11", "Gender": "Male", "Blood_Type": "B+",
+        "Current_Medications": "Metformin 500 mg twice daily, "
+                               "Atorvastatin 10 mg at night",
+        "Drug_Allergies": "Penicillin", "Other_Allergies": "",
+        "Emergency_Status": "Type 2 diabetes",
+        "Emergency_Contacts": "+91 98400 12345", "DNR_Status": False,
+        "Organ_Donor": True,
+    },
+    {
+        "Patient_ID": "P1002", "Name": "Priya Sharma", "Gender": "Female",
+        "Blood_Type": "O-", "Recent_Surgeries": "Appendectomy (2021)",
+        "Medical_Devices": "Pacemaker",
+    },
+]
+
+# Watermark box in mm (x, y, width, height), ignored by --check
+WATERMARK_BOX = (55, 80, 100, 100)
+RENDER_SCALE = 2                 # 144 dpi
+PIXEL_TOLERANCE = 48             # per-channel difference counted as drift
+
+
+def legacy_pdf(patient):
+    """
+    The renderer before the page template, kept for comparison.
+    """
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    if os.path.exists(LOGO_PATH):
+        x, y = pdf.get_x(), pdf.get_y()
+        pdf.image(LOGO_PATH, x=55, y=80, w=100)
+        pdf.set_xy(x, y)
+
+    pdf.set_font("Arial", "B", 20)
+    pdf.set_text_color(200, 0, 0)
+    pdf.cell(0, 15, "EMERGENCY MEDICAL PROFILE", ln=True, align="C")
+    pdf.set_font("Arial", "I", 10)
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(0, 5, "FOR EMERGENCY USE ONLY", ln=True, align="C")
+    pdf.set_draw_color(200, 0, 0)
+    pdf.set_line_width(0.6)
+    pdf.line(10, 35, 200, 35)
+    pdf.ln(12)
+
+    sections = [
+        ("PERSONAL INFORMATION", (240, 240, 240), [
+            ("Patient ID", patient.get("Patient_ID", "N/A")),
+            ("Full Name", patient.get("Name", "N/A")),
+            ("Date of Birth", patient.get("Date_of_Birth", "N/A")),
+            ("Gender", patient.get("Gender", "N/A")),
+            ("Blood Group", patient.get("Blood_Type", "N/A")),
+        ]),
+        ("CRITICAL MEDICAL INFORMATION", (255, 220, 220), [
+            ("Current Medications", patient.get("Current_Medications", "None")),
+            ("Drug Allergies", patient.get("Drug_Allergies", "None")),
+            ("Other Allergies", patient.get("Other_Allergies", "None")),
+            ("Medical Devices", patient.get("Medical_Devices", "None")),
+            ("Recent Surgeries", patient.get("Recent_Surgeries", "None")),
+        ]),
+        ("EMERGENCY STATUS", (255, 180, 180), [
+            ("Emergency Condition", patient.get("Emergency_Status", "None")),
+            ("Emergency Contact", patient.get("Emergency_Contacts", "N/A")),
+            ("Last Vital Signs", patient.get("Vital_Signs_Last_Recorded", "N/A")),
+            ("DNR Status", "YES" if patient.get("DNR_Status") else "NO"),
+            ("Organ Donor", "YES" if patient.get("Organ_Donor") else "NO"),
+        ]),
+    ]
+
+    for n, (title, fill, fields) in enumerate(sections):
+        if n:
+            pdf.ln(5)
+        pdf.set_font("Arial", "B", 14)
+        pdf.set_fill_color(*fill)
+        pdf.cell(0, 10, title, ln=True, fill=True)
+        pdf.ln(3)
+        for label, value in fields:
+            pdf.set_font("Arial", "B", 11)
+            pdf.cell(60, 8, f"{label}:", 0)
+            pdf.set_font("Arial", "", 11)
+            if n == 1:
+                text = str(value) if value else "None"
+                if len(text) > 50:
+                    pdf.ln(8)
+                    pdf.multi_cell(0, 6, text)
+                    continue
+                pdf.cell(0, 8, text, ln=True)
+            else:
+                pdf.cell(0, 8, str(value), ln=True)
+
+    qr = generate_emergency_qr(patient.get("Patient_ID", ""))
+    qr_bytes = qr.getvalue() if hasattr(qr, "getvalue") else qr
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
+        tmp.write(qr_bytes)
+        path = tmp.name
+    pdf.image(path, x=155, y=230, w=40)
+    os.remove(path)
+
+    # The old footer started with an emoji, which the latin-1 core
+    # fonts cannot encode; it is left out here
+    pdf.ln(10)
+    pdf.set_font("Arial", "I", 9)
+    pdf.set_text_color(120, 120, 120)
+    pdf.multi_cell(0, 5, pdf_generator.FOOTER_TEXT)
+
+    return pdf.output(dest="S").encode("latin1")
+
+
+def rasterize(data):
+    page = pdfium.PdfDocument(data)[0]
+    return page.render(scale=RENDER_SCALE).to_pil().convert("RGB")
+
+
+def drift(before, after):
+    """
+    Fraction of pixels outside the watermark box that differ.
+    """
+    diff = ImageChops.difference(before, after).convert("L")
+    diff = diff.point(lambda p: 255 if p > PIXEL_TOLERANCE else 0)
+
+    px_per_mm = RENDER_SCALE * 72 / 25.4
+    x, y, w, h = (round(v * px_per_mm) for v in WATERMARK_BOX)
+    diff.paste(0, (x, y, x + w, y + h))
+
+    changed = diff.histogram()[255]
+    return changed / (diff.width * diff.height)
+
+
+def check():
+    ok = True
+
+    for patient in PATIENTS:
+        share = drift(rasterize(legacy_pdf(patient)),
+                      rasterize(generate_medical_pdf(patient)))
+        print(f"{patient['Patient_ID']}: {share:.4%} pixels differ "
+              f"outside the watermark")
+        ok = ok and share == 0
+
+    # Template reuse must not leak state between patients
+    generate_medical_pdf(PATIENTS[0])
+    reused = rasterize(generate_medical_pdf(PATIENTS[1]))
+    pdf_generator._template = None
+    fresh = rasterize(generate_medical_pdf(PATIENTS[1]))
+    same = ImageChops.difference(reused, fresh).getbbox() is None
+    print(f"template reuse matches fresh template: {same}")
+
+    # What the download buttons call
+    first = cached_medical_pdf(PATIENTS[0])
+    cached = cached_medical_pdf(PATIENTS[0]) is first
+    print(f"cached_medical_pdf served from cache: {cached} "
+          f"({pdf_cache.summary()['hits']} hits)")
+
+    return ok and same and cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--renders", type=int, default=50)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check() else 1)
+
+    # Build the template outside the timed runs
+    generate_medical_pdf(PATIENTS[0])
+
+    for label, render in [("before", legacy_pdf), ("template", generate_medical_pdf)]:
+        start = time.perf_counter()
+        for i in range(args.renders):
+            render(PATIENTS[i % len(PATIENTS)])
+        elapsed = time.perf_counter() - start
+        print(f"{label:<9} {args.renders / elapsed:>8.1f} PDFs/s"
+              f"   {elapsed / args.renders * 1000:>7.1f} ms/PDF")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+QR generation throughput: single calls, memoized calls and the batch API.
+
+Usage (from the repo root):
+    python -m benchmarks.qr_generation --patients 2000 --workers 1 2 4
+
+Prints QRs/sec for uncached one-by-one rendering, repeat calls served
+from the per-patient cache, and generate_qr_batch across worker counts.
+"""
+import argparse
+import time
+
+from utils.qr_generator import (
+    _cache,
+    generate_emergency_qr,
+    generate_qr_batch,
+)
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--format", default="png", choices=["png", "svg"])
+    args = parser.parse_args()
+
+    ids = [f"P{100000 + i}" for i in range(args.patients)]
+    sample = ids[:200]
+
+    def one_by_one():
+        for pid in sample:
+            _cache.clear()
+            generate_emergency_qr(pid, fmt=args.format)
+
+    def memoized():
+        for _ in range(50):
+            for pid in sample[:20]:
+                generate_emergency_qr(pid, fmt=args.format)
+
+    print(f"{'mode':<20} {'QRs/s':>10}")
+    print(f"{'single (uncached)':<20} {rate(len(sample), one_by_one):>10.0f}")
+
+    memoized()   # fill the cache
+    print(f"{'single (memoized)':<20} {rate(1000, memoized):>10.0f}")
+
+    for workers in args.workers:
+        qrs = rate(args.patients, lambda: generate_qr_batch(
+            ids, fmt=args.format, workers=workers
+        ))
+        print(f"{f'batch x{workers}':<20} {qrs:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
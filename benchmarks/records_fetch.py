@@ -0,0 +1,127 @@
+"""
+Admin medical-history fetch: round-trips and latency per patient page.
+
+Usage (from the repo root):
+    python -m benchmarks.records_fetch --patients 50 200 --latency-ms 80
+    python -m benchmarks.records_fetch --api https://.../api/records --admin-key KEY
+
+Compares the old one-request-per-patient loop with RecordsClient's
+bounded concurrent fallback and its batch endpoint. Without --api it
+serves canned records from a local HTTP server that sleeps
+--latency-ms per request, standing in for the network round-trip.
+With --api, pass --ids-from (the patients endpoint) so real patient
+IDs, and therefore real records, are fetched.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from utils.records_client import RecordsClient
+
+
+def fake_records(pid):
+    return [
+        {"_id": f"{pid}-{n}", "Patient_ID": pid, "Record_Type": "Lab Report",
+         "Record_Title": f"Report {n}", "File_Name": f"report_{n}.pdf"}
+        for n in range(3)
+    ]
+
+
+def local_server(latency, batch):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            time.sleep(latency)
+            self._send(200, fake_records(self.path.rsplit("/", 1)[-1]))
+
+        def do_POST(self):
+            time.sleep(latency)
+            length = int(self.headers.get("Content-Length", 0))
+            pids = json.loads(self.rfile.read(length))["patient_ids"]
+            if not batch:
+                self._send(404, {"error": "Not found"})
+            else:
+                self._send(200, {"records": {p: fake_records(p) for p in pids}})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/records"
+
+
+def sequential(api, pids, headers):
+    """
+    The admin page before batching: one blocking request per card.
+    """
+    start = time.perf_counter()
+    for pid in pids:
+        requests.get(f"{api}/{pid}", headers=headers)
+    return {"mode": "sequential", "round_trips": len(pids),
+            "seconds": time.perf_counter() - start}
+
+
+def report(count, stats):
+    print(f"{count:>8} {stats['mode']:<12} {stats['round_trips']:>12} "
+          f"{stats['seconds'] * 1000:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--api", help="live records API, e.g. .../api/records")
+    parser.add_argument("--ids-from", help="live patients API, e.g. .../api/patients")
+    parser.add_argument("--admin-key", default="")
+    args = parser.parse_args()
+
+    headers = {"x-admin-key": args.admin_key}
+    print(f"{'patients':>8} {'mode':<12} {'round-trips':>12} {'latency ms':>10}")
+
+    for count in args.patients:
+        pids = [f"P{100000 + i}" for i in range(count)]
+        if args.api:
+            if args.ids_from:
+                page = requests.get(args.ids_from, params={"limit": count},
+                                    headers=headers, timeout=30).json()
+                pids = [p["Patient_ID"] for p in page["patients"]]
+            apis = {"sequential": args.api, "concurrent": args.api, "batch": args.api}
+            servers = []
+        else:
+            latency = args.latency_ms / 1000
+            old, old_api = local_server(latency, batch=False)
+            new, new_api = local_server(latency, batch=True)
+            apis = {"sequential": old_api, "concurrent": old_api, "batch": new_api}
+            servers = [old, new]
+
+        report(count, sequential(apis["sequential"], pids, headers))
+
+        # Against a backend without /batch: first page probes, later ones skip it
+        client = RecordsClient(apis["concurrent"], headers, workers=args.workers)
+        if args.api:
+            client.batch_supported = False
+        client.fetch(pids[:1])
+        report(count, client.fetch(pids)[1])
+
+        client = RecordsClient(apis["batch"], headers, workers=args.workers)
+        report(count, client.fetch(pids)[1])
+
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
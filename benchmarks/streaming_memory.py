@@ -0,0 +1,102 @@
+"""
+Peak RSS of streaming vs accumulate-everything PDF extraction.
+
+Usage (from the repo root):
+    python -m benchmarks.streaming_memory --pages 50 200 500
+    python -m benchmarks.streaming_memory --check   # exit 1 if not flat
+
+Each run happens in a fresh subprocess, which reports how far its peak
+RSS rose above the baseline taken after loading the PDF bytes.
+
+stream: iter_pdf_pages -> map_medical_data_stream (pages released)
+naive:  pdfplumber pages kept open, text joined, then map_medical_data
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.pdf_extraction import make_fixture
+
+# --check fails if stream growth at the largest size exceeds the
+# smallest size's by more than this
+FLAT_TOLERANCE_MB = 15
+
+
+def _peak_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(path, mode):
+    import pdfplumber
+
+    from utils.file_parser import iter_pdf_pages
+    from utils.medical_mapper import map_medical_data, map_medical_data_stream
+
+    with open(path, "rb") as f:
+        data = f.read()
+    baseline = _peak_mb()
+
+    if mode == "stream":
+        pages = iter_pdf_pages(data, max_pages=10 ** 6, ocr_profile=None)
+        fields = map_medical_data_stream(page["text"] for page in pages)
+    else:
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            text = "".join(page.extract_text() or "" for page in pdf.pages)
+        fields = map_medical_data(text)
+
+    print(json.dumps({
+        "growth_mb": round(_peak_mb() - baseline, 1),
+        "fields": len(fields),
+    }))
+
+
+def measure(path, mode):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.streaming_memory",
+         "--child", path, mode],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'pages':>6} {'stream MB':>10} {'naive MB':>9}")
+    growth = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"{pages}.pdf")
+            with open(path, "wb") as f:
+                f.write(make_fixture(pages))
+
+            stream = measure(path, "stream")["growth_mb"]
+            naive = measure(path, "naive")["growth_mb"]
+            growth.append(stream)
+            print(f"{pages:>6} {stream:>10.1f} {naive:>9.1f}")
+
+    if args.check:
+        rise = growth[-1] - growth[0]
+        if rise > FLAT_TOLERANCE_MB:
+            print(f"FAIL: streaming peak RSS rose {rise:.1f} MB "
+                  f"from {args.pages[0]} to {args.pages[-1]} pages")
+            sys.exit(1)
+        print(f"OK: streaming peak RSS rose {rise:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
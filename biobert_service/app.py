@@ -1,43 +1,588 @@
-from flask import Flask, request, jsonify
-from transformers import BertTokenizer, BertForSequenceClassification
-import torch
+import time
+
+_import_started = time.perf_counter()
+
+from contextlib import contextmanager
+import logging
 import os
+import re
+import threading
+
+from flask import Flask, Response, g, request, jsonify
+import numpy as np
+
+from batcher import MicroBatcher
+from cache import IntentCache, normalize_message
+from metrics import Counter, Gauge, Histogram, Registry
+from rules import RuleClassifier
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("biobert_service")
 
 app = Flask(__name__)
 
-# Load model once at startup
-tokenizer = BertTokenizer.from_pretrained("dmis-lab/biobert-base-cased-v1.1")
-model = BertForSequenceClassification.from_pretrained(
-    "dmis-lab/biobert-base-cased-v1.1",
-    num_labels=7
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Model config
+MODEL_DIR = os.environ.get(
+    "MODEL_DIR", os.path.join(SERVICE_DIR, "models", "biobert-intent")
+)
+MODEL_NAME = "dmis-lab/biobert-base-cased-v1.1"
+# Full commit hash of MODEL_NAME on the hub; branch names like "main"
+# move, so they are refused (see export_model.py)
+MODEL_REVISION = os.environ.get("MODEL_REVISION", "")
+ALLOW_MODEL_DOWNLOAD = os.environ.get("ALLOW_MODEL_DOWNLOAD", "0") == "1"
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch")
+ONNX_MODEL_FILE = os.environ.get("ONNX_MODEL_FILE", "model.onnx")
+BACKGROUND_LOAD = os.environ.get("MODEL_BACKGROUND_LOAD", "1") == "1"
+INTRA_OP_THREADS = int(os.environ.get("INTRA_OP_THREADS", 0)) or None
+
+# Batching config
+BATCHING_ENABLED = os.environ.get("BATCHING_ENABLED", "1") == "1"
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 16))
+MAX_WAIT_MS = float(os.environ.get("MAX_WAIT_MS", 5))
+# /predict_batch runs its misses in the request thread, so one request
+# may only hold a worker for a bounded number of messages
+MAX_BATCH_MESSAGES = int(os.environ.get("MAX_BATCH_MESSAGES", 64))
+
+# Tokenization config: intent messages are short, so cap them well
+# below BERT's 512 and pad each length bucket only to its own longest
+MAX_TOKENS = int(os.environ.get("INTENT_MAX_TOKENS", 64))
+LENGTH_BUCKETS = sorted(
+    int(b) for b in os.environ.get("LENGTH_BUCKETS", "8,16,32,64").split(",")
+)
+
+# Rule fast path config
+RULES_ENABLED = os.environ.get("RULES_ENABLED", "1") == "1"
+
+# Intent cache config
+CACHE_ENABLED = os.environ.get("INTENT_CACHE_ENABLED", "1") == "1"
+CACHE_SIZE = int(os.environ.get("INTENT_CACHE_SIZE", 1024))
+CACHE_TTL_SECONDS = float(os.environ.get("INTENT_CACHE_TTL_SECONDS", 3600))
+
+intents = [
+    "GET_BLOOD_GROUP",
+    "GET_ALLERGIES",
+    "GET_MEDICATIONS",
+    "GET_PROFILE_SUMMARY",
+    "GET_LATEST_REPORT",
+    "GET_REPORT_LIST",
+    "UNKNOWN"
+]
+
+# Synthetic inputs for the warm-up pass (short, batched and long)
+WARMUP_MESSAGES = [
+    "warm up",
+    "what is my blood group",
+    "please show me every report I have uploaded so far " * 8,
+]
+
+# Filled in by load_model()
+tokenizer = None
+backend = None
+
+# ===============================
+# METRICS (rendered only on scrape)
+# ===============================
+# Per worker process; every series carries worker="<pid>" (see Registry)
+metrics = Registry(worker_label="worker")
+
+requests_total = metrics.register(Counter(
+    "biobert_requests_total",
+    "HTTP requests by endpoint and status code"
+))
+in_flight = metrics.register(Gauge(
+    "biobert_in_flight_requests",
+    "Requests currently being handled"
+))
+latency = metrics.register(Histogram(
+    "biobert_latency_seconds",
+    "Latency by stage: tokenize, forward (per message) and total (per request)"
+))
+batch_sizes = metrics.register(Histogram(
+    "biobert_batch_size",
+    "Messages per model forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+))
+token_lengths = metrics.register(Histogram(
+    "biobert_request_tokens",
+    "Tokens per message sent to the model",
+    buckets=LENGTH_BUCKETS
+))
+intent_total = metrics.register(Counter(
+    "biobert_intents_total",
+    "Classified messages by intent and answering tier"
+))
+
+startup = {
+    "ready": False,
+    "error": None,
+    "model": None,
+    "phases": {},
+}
+
+
+@contextmanager
+def startup_phase(name):
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    startup["phases"][name] = round(elapsed, 3)
+    logger.info("startup phase %s took %.2fs", name, elapsed)
+
+
+def is_commit_hash(revision):
+    return bool(re.fullmatch(r"[0-9a-f]{40}", revision or ""))
+
+
+def resolve_model_source():
+    """
+    Prefer the pinned local model directory and load it fully offline.
+    Falls back to the Hugging Face hub only if explicitly allowed.
+    """
+    from backends import missing_model_files
+
+    missing = missing_model_files(MODEL_DIR, INFERENCE_BACKEND, ONNX_MODEL_FILE)
+    if not missing:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        return MODEL_DIR, {"local_files_only": True}
+
+    if ALLOW_MODEL_DOWNLOAD:
+        if not is_commit_hash(MODEL_REVISION):
+            raise ValueError(
+                "ALLOW_MODEL_DOWNLOAD=1 needs MODEL_REVISION set to a full "
+                f"commit hash of {MODEL_NAME}, got {MODEL_REVISION!r}"
+            )
+        logger.warning(
+            "model dir %s incomplete (missing %s), downloading %s@%s",
+            MODEL_DIR, ", ".join(missing), MODEL_NAME, MODEL_REVISION
+        )
+        return MODEL_NAME, {"revision": MODEL_REVISION}
+
+    raise FileNotFoundError(
+        f"Model directory {MODEL_DIR} is missing {', '.join(missing)}. Run "
+        "'python export_model.py export' at build time (bin/post_compile "
+        "does this on deploy) or set ALLOW_MODEL_DOWNLOAD=1."
+    )
+
+
+def load_model():
+    """
+    Load tokenizer and weights, then warm up. Each phase is timed and
+    logged; /readyz only reports ready once all of them have finished.
+    """
+    global tokenizer, backend
+
+    try:
+        startup["phases"]["import"] = round(
+            time.perf_counter() - _import_started, 3
+        )
+
+        with startup_phase("import_ml"):
+            from transformers import AutoTokenizer
+            from backends import load_backend
+
+        model_source, load_kwargs = resolve_model_source()
+        startup["model"] = model_source
+
+        with startup_phase("tokenizer"):
+            # Rust-backed tokenizer; the Python one is far slower
+            tokenizer = AutoTokenizer.from_pretrained(
+                model_source, use_fast=True, **load_kwargs
+            )
+
+        with startup_phase("weights"):
+            backend = load_backend(
+                INFERENCE_BACKEND,
+                model_source,
+                num_labels=len(intents),
+                onnx_file=ONNX_MODEL_FILE,
+                num_threads=INTRA_OP_THREADS,
+                **load_kwargs
+            )
+
+        with startup_phase("warmup"):
+            classify_batch(WARMUP_MESSAGES[:1])
+            classify_batch(WARMUP_MESSAGES)
+
+        startup["ready"] = True
+        logger.info(
+            "model ready (%s, backend=%s) in %.2fs",
+            model_source,
+            INFERENCE_BACKEND,
+            time.perf_counter() - _import_started
+        )
+
+    except Exception as e:
+        startup["error"] = str(e)
+        logger.exception("model startup failed")
+
+
+def start_loading():
+    if BACKGROUND_LOAD:
+        threading.Thread(
+            target=load_model,
+            name="biobert-loader",
+            daemon=True
+        ).start()
+    else:
+        load_model()
+
+
+def length_bucket(length):
+    for bucket in LENGTH_BUCKETS:
+        if length <= bucket:
+            return bucket
+    return MAX_TOKENS
+
+
+def softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+def run_model(texts):
+    """
+    Tokenize messages, group them by length bucket and run one padded
+    forward pass per bucket (at most MAX_BATCH_SIZE each), so short
+    messages are never padded up to a long one.
+    Returns a result dict per message, in order; each carries the
+    tokenize / forward seconds of the batch it ran in under "timing".
+    """
+    started = time.perf_counter()
+    encodings = tokenizer(texts, truncation=True, max_length=MAX_TOKENS)
+    lengths = [len(ids) for ids in encodings["input_ids"]]
+    encode_seconds = time.perf_counter() - started
+
+    buckets = {}
+    for i, length in enumerate(lengths):
+        buckets.setdefault(length_bucket(length), []).append(i)
+
+    results = [None] * len(texts)
+
+    for indices in buckets.values():
+        for start in range(0, len(indices), MAX_BATCH_SIZE):
+            chunk = indices[start:start + MAX_BATCH_SIZE]
+
+            padded = time.perf_counter()
+            inputs = tokenizer.pad(
+                {k: [encodings[k][i] for i in chunk] for k in encodings},
+                return_tensors="np"
+            )
+            forward = time.perf_counter()
+            probs = softmax(backend.logits(dict(inputs)))
+            done = time.perf_counter()
+
+            timing = {
+                "tokenize": encode_seconds + (forward - padded),
+                "forward": done - forward,
+            }
+            batch_sizes.observe(len(chunk))
+
+            for i, row in zip(chunk, probs):
+                intent_id = int(row.argmax())
+                results[i] = {
+                    "intent": intents[intent_id],
+                    "confidence": round(float(row[intent_id]), 4),
+                    "tokens": lengths[i],
+                    "tier": "model",
+                    "timing": timing,
+                }
+                token_lengths.observe(lengths[i])
+                latency.observe(timing["tokenize"], stage="tokenize")
+                latency.observe(timing["forward"], stage="forward")
+
+    return results
+
+
+def classify_batch(texts):
+    """
+    Classify a list of messages. Returns one intent per message.
+    """
+    return [result["intent"] for result in run_model(texts)]
+
+
+batcher = MicroBatcher(
+    run_model,
+    max_batch_size=MAX_BATCH_SIZE,
+    max_wait_ms=MAX_WAIT_MS
+)
+
+
+intent_cache = IntentCache(
+    max_size=CACHE_SIZE,
+    ttl_seconds=CACHE_TTL_SECONDS
 )
-model.eval()  # Put in evaluation mode
+
+for _stat in ("hits", "misses", "evictions", "size"):
+    metrics.register(Gauge(
+        f"biobert_intent_cache_{_stat}",
+        f"Intent cache {_stat}",
+        callback=lambda stat=_stat: intent_cache.stats()[stat]
+    ))
+
+
+rule_classifier = RuleClassifier()
+
+
+def fast_path(text, use_cache):
+    """
+    Try the rule tier, then the cache. Returns a result dict or None
+    when the message has to go to the model.
+    """
+    if RULES_ENABLED:
+        match = rule_classifier.classify(text)
+        if match is not None:
+            intent, confidence = match
+            return {
+                "intent": intent,
+                "confidence": confidence,
+                "tokens": None,
+                "tier": "rules",
+            }
+
+    if use_cache:
+        cached = intent_cache.get(normalize_message(text))
+        if cached is not None:
+            intent, confidence = cached
+            return {
+                "intent": intent,
+                "confidence": confidence,
+                "tokens": None,
+                "tier": "cache",
+            }
+
+    return None
+
+
+def classify(text, batching=None, use_cache=None):
+    """
+    Classify a single message: rule fast path, then the intent cache,
+    then the model (through the micro-batcher when enabled).
+    Returns a dict with intent, confidence, token count and tier.
+    """
+    if batching is None:
+        batching = BATCHING_ENABLED
+    if use_cache is None:
+        use_cache = CACHE_ENABLED
+
+    result = fast_path(text, use_cache)
+    if result is not None:
+        return result
+
+    if batching:
+        result = batcher.submit(text)
+    else:
+        result = run_model([text])[0]
+
+    if use_cache:
+        intent_cache.put(
+            normalize_message(text),
+            (result["intent"], result["confidence"])
+        )
+
+    return result
+
+
+def use_cache_for(data):
+    """
+    Callers can bypass the cache per request with {"cache": false}.
+    """
+    return CACHE_ENABLED and data.get("cache", True) is not False
+
+
+def with_timing(body, results):
+    """
+    Record intent metrics for the results, move their batch timings out
+    of the JSON body and into a Server-Timing header.
+    """
+    tokenize = forward = 0.0
+    seen = set()
+    for result in results:
+        timing = result.pop("timing", None)
+        # Messages from the same forward pass share one timing dict
+        if timing and id(timing) not in seen:
+            seen.add(id(timing))
+            tokenize += timing["tokenize"]
+            forward += timing["forward"]
+        if result["tier"]:
+            intent_total.inc(intent=result["intent"], tier=result["tier"])
+
+    total = time.perf_counter() - g.started
+    response = jsonify(body)
+    response.headers["Server-Timing"] = (
+        f"tokenize;dur={tokenize * 1000:.2f}, "
+        f"forward;dur={forward * 1000:.2f}, "
+        f"total;dur={total * 1000:.2f}"
+    )
+    return response
+
+
+def not_ready():
+    return jsonify({
+        "error": "model not ready",
+        "intent": "UNKNOWN"
+    }), 503
+
 
 @app.route("/predict", methods=["POST"])
 def predict():
-    data = request.get_json()
+    if not startup["ready"]:
+        return not_ready()
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "body must be a JSON object"}), 400
+
     text = data.get("message", "")
+    if not isinstance(text, str):
+        return jsonify({"error": "message must be a string"}), 400
 
     if not text:
         return jsonify({"intent": "UNKNOWN"})
 
-    with torch.no_grad():  # Disable gradient calculation
-        inputs = tokenizer(text, return_tensors="pt", truncation=True)
-        outputs = model(**inputs)
-        intent_id = torch.argmax(outputs.logits, dim=1).item()
+    result = classify(text, use_cache=use_cache_for(data))
+    return with_timing(result, [result])
+
+
+@app.route("/predict_batch", methods=["POST"])
+def predict_batch():
+    if not startup["ready"]:
+        return not_ready()
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "body must be a JSON object"}), 400
+
+    messages = data.get("messages", [])
+
+    if not isinstance(messages, list):
+        return jsonify({"error": "messages must be a list"}), 400
+
+    if len(messages) > MAX_BATCH_MESSAGES:
+        return jsonify({
+            "error": f"at most {MAX_BATCH_MESSAGES} messages per request"
+        }), 413
+
+    use_cache = use_cache_for(data)
+    unknown = {"intent": "UNKNOWN", "confidence": None,
+               "tokens": None, "tier": None}
+    results = [dict(unknown) for _ in messages]
+    pending = []
+
+    for i, text in enumerate(messages):
+        if not text:
+            continue
+        text = str(text)
+        result = fast_path(text, use_cache)
+        if result is not None:
+            results[i] = result
+            continue
+        pending.append((i, text))
+
+    if pending:
+        predicted = run_model([text for _, text in pending])
+        for (i, text), result in zip(pending, predicted):
+            results[i] = result
+            if use_cache:
+                intent_cache.put(
+                    normalize_message(text),
+                    (result["intent"], result["confidence"])
+                )
+
+    return with_timing({
+        "intents": [r["intent"] for r in results],
+        "results": results,
+    }, results)
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    # Liveness only: the process is up and serving HTTP
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    status = 200 if startup["ready"] else 503
+    return jsonify({
+        "ready": startup["ready"],
+        "error": startup["error"],
+        "backend": INFERENCE_BACKEND,
+        "model": startup["model"],
+        "phases": startup["phases"],
+    }), status
+
+
+@app.route("/tokens/stats", methods=["GET"])
+def token_stats():
+    counts = token_lengths.bucket_counts()
+    return jsonify({
+        "worker": os.getpid(),
+        "max_tokens": MAX_TOKENS,
+        "buckets": LENGTH_BUCKETS,
+        # bucket upper bound -> requests whose token count fell in it
+        "counts": {str(k): v for k, v in counts.items() if v},
+    })
+
+
+@app.route("/tiers/stats", methods=["GET"])
+def tier_stats():
+    counts = {"rules": 0, "cache": 0, "model": 0}
+    for key, value in intent_total.values().items():
+        counts[dict(key)["tier"]] += value
+    total = sum(counts.values())
+    return jsonify({
+        "worker": os.getpid(),
+        "rules_enabled": RULES_ENABLED,
+        "counts": counts,
+        "model_share": counts["model"] / total if total else None,
+    })
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify({
+        "worker": os.getpid(),
+        "enabled": CACHE_ENABLED,
+        **intent_cache.stats()
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(
+        metrics.render(),
+        mimetype="text/plain; version=0.0.4"
+    )
+
+
+@app.before_request
+def start_request_timer():
+    g.started = time.perf_counter()
+    in_flight.inc()
+
+
+@app.teardown_request
+def finish_request(error=None):
+    in_flight.dec()
+
+
+@app.after_request
+def count_request(response):
+    elapsed = time.perf_counter() - g.started
+    requests_total.inc(endpoint=request.endpoint, status=response.status_code)
+    if request.endpoint in ("predict", "predict_batch"):
+        latency.observe(elapsed, stage="total")
+    return response
+
 
-    intents = [
-        "GET_BLOOD_GROUP",
-        "GET_ALLERGIES",
-        "GET_MEDICATIONS",
-        "GET_PROFILE_SUMMARY",
-        "GET_LATEST_REPORT",
-        "GET_REPORT_LIST",
-        "UNKNOWN"
-    ]
+start_loading()
 
-    return jsonify({"intent": intents[intent_id]})
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    app.run(host="0.0.0.0", port=port)
+    app.run(host="0.0.0.0", port=port, threaded=True)
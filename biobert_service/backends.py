@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import torch
+from transformers import BertForSequenceClassification
+
+# Backend names accepted by INFERENCE_BACKEND
+BACKENDS = ["torch", "torch-int8", "onnx"]
+
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+# save_pretrained() writes one of these, depending on the transformers version
+WEIGHTS_FILES = ["model.safetensors", "pytorch_model.bin"]
+
+
+def missing_model_files(model_dir, name="torch", onnx_file=ONNX_FILE):
+    """
+    Files backend `name` needs that model_dir lacks; [] means a complete
+    export. An empty or half-written directory is not a model.
+    """
+    missing = []
+    if not os.path.isfile(os.path.join(model_dir, "config.json")):
+        missing.append("config.json")
+
+    if name == "onnx":
+        if not os.path.isfile(os.path.join(model_dir, onnx_file)):
+            missing.append(onnx_file)
+    elif not any(os.path.isfile(os.path.join(model_dir, f)) for f in WEIGHTS_FILES):
+        missing.append(" or ".join(WEIGHTS_FILES))
+
+    return missing
+
+
+def set_intra_op_threads(num_threads):
+    """
+    Cap torch's intra-op thread pool for this process.
+    """
+    if num_threads:
+        torch.set_num_threads(int(num_threads))
+
+
+class TorchBackend:
+    """
+    Eager fp32 PyTorch model (the original serving path).
+    """
+
+    name = "torch"
+
+    def __init__(self, model):
+        self.model = model
+        self.model.eval()
+
+    def logits(self, inputs):
+        """
+        inputs: dict of int64 numpy arrays from the tokenizer.
+        Returns a (batch, num_labels) float numpy array.
+        """
+        with torch.no_grad():
+            tensors = {k: torch.from_numpy(v) for k, v in inputs.items()}
+            return self.model(**tensors).logits.numpy()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """
+    Dynamically int8-quantized PyTorch model. Linear layers run with
+    int8 weights; quantization happens once at load, no export needed.
+    """
+
+    name = "torch-int8"
+
+    def __init__(self, model):
+        model.eval()
+        quantized = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        super().__init__(quantized)
+
+
+class OnnxBackend:
+    """
+    ONNX Runtime session over a model exported by export_model.py.
+    """
+
+    name = "onnx"
+
+    def __init__(self, onnx_path, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(
+            onnx_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def logits(self, inputs):
+        feed = {
+            name: inputs[name].astype(np.int64)
+            for name in self.input_names
+        }
+        return self.session.run(["logits"], feed)[0]
+
+
+def load_backend(name, model_path, num_labels, onnx_file=ONNX_FILE,
+                 num_threads=None, **load_kwargs):
+    """
+    Build the inference backend selected by name.
+
+    model_path is a local model directory (as written by
+    export_model.py) or a Hugging Face model id for the torch backends.
+    num_threads caps intra-op threads; extra keyword arguments go to
+    from_pretrained().
+    """
+    if name == "onnx":
+        return OnnxBackend(
+            os.path.join(model_path, onnx_file),
+            num_threads=num_threads
+        )
+
+    set_intra_op_threads(num_threads)
+
+    model = BertForSequenceClassification.from_pretrained(
+        model_path,
+        num_labels=num_labels,
+        **load_kwargs
+    )
+
+    if name == "torch":
+        return TorchBackend(model)
+    if name == "torch-int8":
+        return QuantizedTorchBackend(model)
+
+    raise ValueError(f"Unknown inference backend: {name}")
@@ -0,0 +1,91 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-message requests for a few milliseconds
+    and runs them through the model as one padded batch.
+
+    batch_fn receives a list of messages and must return one result
+    per message, in the same order.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=5):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+
+    def submit(self, text, timeout=None):
+        """
+        Queue one message and block until its batch has been processed.
+        """
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future.result(timeout=timeout)
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so each process starts its own
+        if self._worker_running():
+            return
+
+        with self._lock:
+            if self._worker_running():
+                return
+
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+
+            self._pid = os.getpid()
+            self._worker = threading.Thread(
+                target=self._run,
+                name="biobert-batcher",
+                daemon=True
+            )
+            self._worker.start()
+
+    def _worker_running(self):
+        return (
+            self._worker is not None
+            and self._pid == os.getpid()
+            and self._worker.is_alive()
+        )
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+
+            try:
+                results = self.batch_fn(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
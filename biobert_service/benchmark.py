@@ -0,0 +1,347 @@
+"""
+Throughput / latency benchmark for the intent service.
+
+Usage:
+    python benchmark.py --mode batching --requests 500 --concurrency 16
+    python benchmark.py --mode cache --requests 500
+    python benchmark.py --mode backends --model-dir models/biobert-intent
+    python benchmark.py --mode workers --workers 1,2,4,8
+    python benchmark.py --mode rules
+
+batching: runs the same concurrent load with micro-batching off and on.
+cache:    runs repeat questions with the intent cache bypassed and used.
+backends: loads each inference backend in a fresh process and reports
+          single-message latency, peak RSS and intent agreement with fp32.
+workers:  starts gunicorn (gunicorn.conf.py) with each worker count and
+          drives HTTP load against it, reporting msg/s, p99 and memory.
+rules:    classifies a labelled sample with the rule fast path off and
+          on, reporting accuracy, the share answered by each tier, msg/s.
+
+Prints messages/sec and p50 / p99 latency for each run.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Load the model synchronously when benchmarking app.py in-process
+os.environ.setdefault("MODEL_BACKGROUND_LOAD", "0")
+
+SAMPLE_MESSAGES = [
+    "what is my blood group",
+    "my allergies?",
+    "which medications am I taking",
+    "show my profile summary",
+    "open my latest report",
+    "list all my reports",
+    "hello there",
+    "do I have any drug allergies",
+]
+
+# (message, expected intent) pairs for measuring the rule fast path
+LABELLED_MESSAGES = [
+    ("what is my blood group", "GET_BLOOD_GROUP"),
+    ("blood type?", "GET_BLOOD_GROUP"),
+    ("my allergies?", "GET_ALLERGIES"),
+    ("am I allergic to anything", "GET_ALLERGIES"),
+    ("which medications am I taking", "GET_MEDICATIONS"),
+    ("what medicines do I take", "GET_MEDICATIONS"),
+    ("show my profile summary", "GET_PROFILE_SUMMARY"),
+    ("give me a summary", "GET_PROFILE_SUMMARY"),
+    ("open my latest report", "GET_LATEST_REPORT"),
+    ("show the most recent lab result", "GET_LATEST_REPORT"),
+    ("list all my reports", "GET_REPORT_LIST"),
+    ("which records have I uploaded", "GET_REPORT_LIST"),
+    ("do I have any drug allergies or medicines", "UNKNOWN"),
+    ("hello", "UNKNOWN"),
+    ("what is the weather today", "UNKNOWN"),
+    ("fasting blood sugar 130 mg/dl", "UNKNOWN"),
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_load(fn, total, concurrency):
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        fn(SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)])
+        latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "msgs_per_sec": total / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def report(label, stats):
+    print(
+        f"{label:<14} {stats['msgs_per_sec']:>9.1f} msg/s"
+        f"   p50 {stats['p50_ms']:>8.1f} ms"
+        f"   p99 {stats['p99_ms']:>8.1f} ms"
+    )
+
+
+def bench_batching(args):
+    import app
+
+    app.RULES_ENABLED = False
+
+    # Warm up both paths so model init is not measured
+    app.classify("warm up", batching=False, use_cache=False)
+    app.classify("warm up", batching=True, use_cache=False)
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"max batch {app.MAX_BATCH_SIZE}, max wait {app.MAX_WAIT_MS} ms"
+    )
+    report(
+        "batching off",
+        run_load(lambda t: app.classify(t, batching=False, use_cache=False),
+                 args.requests, args.concurrency)
+    )
+    report(
+        "batching on",
+        run_load(lambda t: app.classify(t, batching=True, use_cache=False),
+                 args.requests, args.concurrency)
+    )
+
+
+def bench_cache(args):
+    import app
+
+    app.RULES_ENABLED = False
+
+    app.intent_cache.clear()
+    for text in SAMPLE_MESSAGES:
+        app.classify(text, batching=False, use_cache=True)
+
+    print(f"{args.requests} repeat questions, concurrency {args.concurrency}")
+    report(
+        "cache bypass",
+        run_load(lambda t: app.classify(t, batching=False, use_cache=False),
+                 args.requests, args.concurrency)
+    )
+    report(
+        "cache on",
+        run_load(lambda t: app.classify(t, batching=False, use_cache=True),
+                 args.requests, args.concurrency)
+    )
+    print(app.intent_cache.stats())
+
+
+def bench_rules(args):
+    import app
+
+    texts = [text for text, _ in LABELLED_MESSAGES]
+    app.classify(texts[0], batching=False, use_cache=False)
+
+    print(f"{len(LABELLED_MESSAGES)} labelled messages x {args.repeats}")
+    for enabled in (False, True):
+        app.RULES_ENABLED = enabled
+        tiers = {"rules": 0, "model": 0}
+        correct = 0
+
+        started = time.perf_counter()
+        for _ in range(args.repeats):
+            for text, expected in LABELLED_MESSAGES:
+                result = app.classify(text, batching=False, use_cache=False)
+                tiers[result["tier"]] += 1
+                correct += result["intent"] == expected
+        elapsed = time.perf_counter() - started
+
+        total = len(LABELLED_MESSAGES) * args.repeats
+        print(
+            f"rules {'on ' if enabled else 'off'}"
+            f"   accuracy {correct / total:>6.1%}"
+            f"   rules {tiers['rules'] / total:>6.1%}"
+            f"   model {tiers['model'] / total:>6.1%}"
+            f"   {total / elapsed:>9.1f} msg/s"
+        )
+
+
+def _backend_worker(name, model_dir, messages, repeats, results):
+    import resource
+    from transformers import AutoTokenizer
+    from backends import load_backend
+    from export_model import NUM_LABELS, predict_ids
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+    backend = load_backend(name, model_dir, NUM_LABELS)
+    predict_ids(backend, tokenizer, messages[:2])
+
+    latencies = []
+    for _ in range(repeats):
+        for text in messages:
+            start = time.perf_counter()
+            predict_ids(backend, tokenizer, [text])
+            latencies.append(time.perf_counter() - start)
+
+    results.put({
+        "ids": predict_ids(backend, tokenizer, messages),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        # ru_maxrss is in KB on Linux
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def bench_backends(args):
+    from backends import BACKENDS
+    from export_model import PARITY_MESSAGES, agreement
+
+    ctx = multiprocessing.get_context("spawn")
+    reference = None
+
+    print(f"{len(PARITY_MESSAGES)} messages x {args.repeats} repeats")
+    for name in BACKENDS:
+        results = ctx.Queue()
+        proc = ctx.Process(
+            target=_backend_worker,
+            args=(name, args.model_dir, PARITY_MESSAGES,
+                  args.repeats, results)
+        )
+        proc.start()
+        stats = results.get()
+        proc.join()
+
+        if reference is None:
+            reference = stats["ids"]
+
+        print(
+            f"{name:<12} p50 {stats['p50_ms']:>7.1f} ms"
+            f"   p99 {stats['p99_ms']:>7.1f} ms"
+            f"   peak RSS {stats['rss_mb']:>7.0f} MB"
+            f"   agreement {agreement(reference, stats['ids']):.1%}"
+        )
+
+
+def _process_tree(pid):
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        children = []
+    for child in children:
+        pids.extend(_process_tree(child))
+    return pids
+
+
+def _memory_mb(pid):
+    """
+    Summed RSS and PSS (MB) of a process and its children. PSS splits
+    shared copy-on-write pages between the processes that map them.
+    """
+    rss = pss = 0
+    for p in _process_tree(pid):
+        try:
+            with open(f"/proc/{p}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Rss:"):
+                        rss += int(line.split()[1])
+                    elif line.startswith("Pss:"):
+                        pss += int(line.split()[1])
+        except OSError:
+            continue
+    return rss / 1024, pss / 1024
+
+
+def _wait_ready(base_url, proc, timeout=600):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            with urllib.request.urlopen(f"{base_url}/readyz", timeout=2):
+                return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    raise TimeoutError("service did not become ready")
+
+
+def bench_workers(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    service_dir = os.path.dirname(os.path.abspath(__file__))
+
+    def http_predict(text):
+        body = json.dumps({"message": text, "cache": False}).encode()
+        req = urllib.request.Request(
+            f"{base_url}/predict",
+            data=body,
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(req, timeout=60) as res:
+            res.read()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'workers':>7} {'msg/s':>9} {'p99 ms':>9} "
+          f"{'RSS MB':>9} {'PSS MB':>9}")
+
+    for count in [int(n) for n in args.workers.split(",")]:
+        env = dict(os.environ, WEB_CONCURRENCY=str(count),
+                   PORT=str(args.port))
+        proc = subprocess.Popen(
+            ["gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+            cwd=service_dir,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            _wait_ready(base_url, proc)
+            stats = run_load(http_predict, args.requests, args.concurrency)
+            rss, pss = _memory_mb(proc.pid)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+        print(f"{count:>7} {stats['msgs_per_sec']:>9.1f} "
+              f"{stats['p99_ms']:>9.1f} {rss:>9.0f} {pss:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--mode",
+        choices=["batching", "cache", "backends", "workers", "rules"],
+        default="batching"
+    )
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model-dir", default="models/biobert-intent")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.mode == "batching":
+        bench_batching(args)
+    elif args.mode == "cache":
+        bench_cache(args)
+    elif args.mode == "backends":
+        bench_backends(args)
+    elif args.mode == "workers":
+        bench_workers(args)
+    elif args.mode == "rules":
+        bench_rules(args)
+
+
+if __name__ == "__main__":
+    main()
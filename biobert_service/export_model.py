@@ -0,0 +1,227 @@
+"""
+Offline export / quantization and parity check for the intent model.
+
+Usage:
+    MODEL_REVISION=<commit> python export_model.py export --out models/biobert-intent
+    python export_model.py check --model-dir models/biobert-intent --backend onnx
+
+export: saves the fp32 model + tokenizer to a local directory and
+        writes model.onnx and a dynamically int8-quantized model.int8.onnx
+        next to them, so every backend serves the same weights.
+check:  runs the fp32 model and the chosen backend over a test set and
+        fails if they disagree on too many intents.
+
+The service loads models/biobert-intent offline and never downloads by
+default, so export is a required deploy step: bin/post_compile runs it
+at build time unless the directory holds a complete export. --revision
+(or MODEL_REVISION) must be a full commit hash of the hub repo, so every
+build exports the same weights. Export writes into a temporary sibling
+directory and renames it into place only once every file is written,
+so an interrupted build never leaves a half-exported --out behind.
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+import torch
+from transformers import AutoTokenizer, BertForSequenceClassification
+
+from backends import (
+    BACKENDS, ONNX_FILE, ONNX_INT8_FILE, load_backend, missing_model_files
+)
+
+DEFAULT_MODEL = "dmis-lab/biobert-base-cased-v1.1"
+NUM_LABELS = 7
+
+PARITY_MESSAGES = [
+    "what is my blood group",
+    "blood type?",
+    "tell me my blood group please",
+    "my allergies?",
+    "am I allergic to anything",
+    "list my drug allergies",
+    "which medications am I taking",
+    "what medicines do I take",
+    "current medication list",
+    "show my profile summary",
+    "give me a summary of my profile",
+    "open my latest report",
+    "what did my most recent report say",
+    "show the newest lab result",
+    "list all my reports",
+    "which records have I uploaded",
+    "show my medical records",
+    "hello",
+    "thanks a lot",
+    "who are you",
+    "can you book an appointment",
+    "what is the weather today",
+    "Patient has history of penicillin allergy and takes metformin 500mg",
+    "HbA1c 7.2 % fasting blood sugar 130 mg/dl",
+]
+
+
+def load_messages(path):
+    if not path:
+        return PARITY_MESSAGES
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def export(args):
+    if not re.fullmatch(r"[0-9a-f]{40}", args.revision or ""):
+        sys.exit(
+            f"--revision must be a full commit hash of {args.model}, "
+            f"got {args.revision!r}"
+        )
+
+    out = os.path.abspath(args.out)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    tmp = tempfile.mkdtemp(
+        prefix=f".{os.path.basename(out)}-", dir=os.path.dirname(out)
+    )
+    try:
+        export_to(args, tmp)
+
+        missing = sorted(set(
+            missing_model_files(tmp, "torch") + missing_model_files(tmp, "onnx")
+        ))
+        if missing:
+            sys.exit(f"Export incomplete, missing {', '.join(missing)}")
+
+        # A directory can't be os.replace()d onto a non-empty one, so
+        # move any previous export aside first
+        old = None
+        if os.path.exists(out):
+            old = f"{tmp}.old"
+            os.replace(out, old)
+        os.replace(tmp, out)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"Export complete: {out}")
+
+
+def export_to(args, out):
+    torch.manual_seed(args.seed)
+
+    tokenizer = AutoTokenizer.from_pretrained(
+        args.model, revision=args.revision, use_fast=True
+    )
+    model = BertForSequenceClassification.from_pretrained(
+        args.model,
+        revision=args.revision,
+        num_labels=NUM_LABELS
+    )
+    model.eval()
+
+    tokenizer.save_pretrained(out)
+    model.save_pretrained(out)
+    print(f"Saved fp32 model and tokenizer to {out}")
+
+    sample = tokenizer(["what is my blood group"], return_tensors="pt")
+    onnx_path = os.path.join(out, ONNX_FILE)
+
+    torch.onnx.export(
+        model,
+        (
+            sample["input_ids"],
+            sample["attention_mask"],
+            sample["token_type_ids"],
+        ),
+        onnx_path,
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "token_type_ids": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=14,
+    )
+    print(f"Exported ONNX model to {onnx_path}")
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = os.path.join(out, ONNX_INT8_FILE)
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"Wrote int8 ONNX model to {int8_path}")
+
+
+def predict_ids(backend, tokenizer, messages, batch_size=16, max_length=64):
+    ids = []
+    for start in range(0, len(messages), batch_size):
+        inputs = tokenizer(
+            messages[start:start + batch_size],
+            return_tensors="np",
+            truncation=True,
+            max_length=max_length,
+            padding=True
+        )
+        ids.extend(backend.logits(dict(inputs)).argmax(axis=1).tolist())
+    return ids
+
+
+def agreement(reference, candidate):
+    same = sum(1 for a, b in zip(reference, candidate) if a == b)
+    return same / len(reference) if reference else 1.0
+
+
+def check(args):
+    messages = load_messages(args.test_file)
+    tokenizer = AutoTokenizer.from_pretrained(args.model_dir, use_fast=True)
+
+    reference = load_backend("torch", args.model_dir, NUM_LABELS)
+    candidate = load_backend(
+        args.backend, args.model_dir, NUM_LABELS, onnx_file=args.onnx_file
+    )
+
+    expected = predict_ids(reference, tokenizer, messages)
+    actual = predict_ids(candidate, tokenizer, messages)
+    score = agreement(expected, actual)
+
+    print(
+        f"{args.backend}: {score:.1%} intent agreement with fp32 "
+        f"on {len(messages)} messages"
+    )
+    for text, a, b in zip(messages, expected, actual):
+        if a != b:
+            print(f"  mismatch: {text!r} fp32={a} {args.backend}={b}")
+
+    if score < args.min_agreement:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export")
+    p_export.add_argument("--model", default=DEFAULT_MODEL)
+    p_export.add_argument("--revision", default=os.environ.get("MODEL_REVISION"))
+    p_export.add_argument("--out", default="models/biobert-intent")
+    p_export.add_argument("--seed", type=int, default=0)
+
+    p_check = sub.add_parser("check")
+    p_check.add_argument("--model-dir", default="models/biobert-intent")
+    p_check.add_argument("--backend", choices=BACKENDS, default="onnx")
+    p_check.add_argument("--onnx-file", default=ONNX_FILE)
+    p_check.add_argument("--test-file", help="one message per line")
+    p_check.add_argument("--min-agreement", type=float, default=0.98)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export(args)
+    elif args.command == "check":
+        check(args)
+
+
+if __name__ == "__main__":
+    main()
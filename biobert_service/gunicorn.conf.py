@@ -0,0 +1,69 @@
+"""
+Production gunicorn config for the intent service.
+
+The model is loaded once in the master (preload_app) and the workers
+are forked from it, so the weights are shared copy-on-write instead of
+every worker holding its own copy. Total RSS therefore grows by the
+per-worker private memory only, not by a full model per worker.
+
+Env:
+    WEB_CONCURRENCY    number of worker processes (default 2)
+    GUNICORN_THREADS   request threads per worker (default 8)
+    INTRA_OP_THREADS   torch / onnxruntime threads per worker
+                       (default: CPU cores / workers, at least 1)
+
+Throughput vs workers:
+    python benchmark.py --mode workers --workers 1,2,4,8
+
+prints msg/s, p99 latency, summed RSS and summed PSS (shared pages
+split between the processes that map them) for each worker count.
+Pick the smallest worker count where msg/s stops improving; past
+cores / INTRA_OP_THREADS workers start competing for the same cores.
+
+Metrics: /metrics, /tiers/stats, /tokens/stats and /cache/stats report
+the worker that served the scrape, not the service. Every Prometheus
+series is labelled worker="<pid>"; sum over that label across scrapes
+(sum without (worker) (...)) to get service-wide totals. The JSON stats
+endpoints include the same "worker" pid.
+
+No curve is recorded here yet: it has not been measured on deploy-class
+hardware (it needs the exported model and more than one core). Record
+the table printed above, with the host's core count, when it is.
+"""
+import gc
+import multiprocessing
+import os
+
+# The model must be fully loaded before fork, not in a loader thread
+os.environ["MODEL_BACKGROUND_LOAD"] = "0"
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+timeout = 120
+
+# onnxruntime thread pools do not survive fork(), so ONNX workers
+# load their own session instead of sharing the master's
+preload_app = os.environ.get("INFERENCE_BACKEND", "torch") != "onnx"
+
+intra_op_threads = int(os.environ.get("INTRA_OP_THREADS", 0)) or max(
+    1, multiprocessing.cpu_count() // workers
+)
+os.environ["INTRA_OP_THREADS"] = str(intra_op_threads)
+
+
+def when_ready(server):
+    # Move everything allocated during preload out of the collector's
+    # reach, so GC passes in workers don't write to (and un-share) it
+    gc.freeze()
+    server.log.info(
+        "serving with %d workers x %d intra-op threads (preload=%s)",
+        workers, intra_op_threads, preload_app
+    )
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from backends import set_intra_op_threads
+        set_intra_op_threads(intra_op_threads)
@@ -0,0 +1,176 @@
+import bisect
+import os
+import threading
+
+# Latency buckets in seconds, 1 ms .. 10 s
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by labels.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self, extra=None):
+        for key, value in sorted(self.values().items()):
+            labels = _format_labels(key, extra)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down. If a callback is given it is read
+    at scrape time instead.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, callback=None):
+        super().__init__(name, help_text)
+        self.callback = callback
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def values(self):
+        if self.callback is not None:
+            return {(): self.callback()}
+        return super().values()
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, optionally split by labels. Observations
+    only bump a bucket count; cumulative counts are built at scrape.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                }
+            series["counts"][index] += 1
+            series["sum"] += value
+
+    def bucket_counts(self, **labels):
+        """
+        Non-cumulative count per bucket upper bound (inf last).
+        """
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            counts = list(series["counts"]) if series else []
+        bounds = list(self.buckets) + [float("inf")]
+        return dict(zip(bounds, counts))
+
+    def render(self, extra=None):
+        extra = extra or []
+        with self._lock:
+            snapshot = {
+                key: (list(s["counts"]), s["sum"])
+                for key, s in self._series.items()
+            }
+
+        bounds = list(self.buckets) + [float("inf")]
+        for key, (counts, total) in sorted(snapshot.items()):
+            running = 0
+            for bound, count in zip(bounds, counts):
+                running += count
+                le = extra + [("le", _format_value(bound))]
+                yield f"{self.name}_bucket{_format_labels(key, le)} {running}"
+            labels = _format_labels(key, extra)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {running}"
+
+
+class Registry:
+    """
+    Holds the service's metrics and renders them in the Prometheus
+    text exposition format. Nothing is computed until a scrape.
+
+    Values live in this process only. Under a preforking server each
+    worker keeps its own and a scrape reaches whichever worker accepts
+    it, so with worker_label every series is labelled with the pid of
+    the process that rendered it: sum across that label (e.g.
+    sum without (worker) (rate(...))) for service-wide numbers. A
+    restarted worker starts from zero under a new pid.
+    """
+
+    def __init__(self, worker_label=None):
+        self.metrics = []
+        self.worker_label = worker_label
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        # Read at scrape time: registries created before fork are shared
+        extra = [(self.worker_label, os.getpid())] if self.worker_label else None
+
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(extra))
+        return "\n".join(lines) + "\n"
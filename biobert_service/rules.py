@@ -0,0 +1,77 @@
+import re
+
+# Keyword patterns per intent, compiled once at import. Kept in line with
+# detectIntent() in backend/routes/chatbot.js.
+INTENT_PATTERNS = {
+    "GET_BLOOD_GROUP": [
+        r"\bblood\b(?!\s+(sugar|pressure|tests?|reports?|counts?))",
+    ],
+    "GET_ALLERGIES": [
+        r"\ballerg(y|ies|ic)\b",
+    ],
+    "GET_MEDICATIONS": [
+        r"\bmedications?\b",
+        r"\bmedicines?\b",
+        r"\bmeds\b",
+        r"\b(tablets?|pills?|prescriptions?)\b",
+    ],
+    "GET_PROFILE_SUMMARY": [
+        r"\bsummary\b",
+        r"\bprofile\b",
+    ],
+    "GET_LATEST_REPORT": [
+        r"\b(latest|recent|newest|last)\s+(lab\s+)?(report|result|test)s?\b",
+    ],
+    "GET_REPORT_LIST": [
+        r"\breports?\b",
+        r"\brecords?\b",
+    ],
+}
+
+# A latest-report match also hits the generic report patterns
+OVERRIDES = {
+    "GET_LATEST_REPORT": "GET_REPORT_LIST",
+}
+
+# Longer messages (pasted report text etc.) are left to the model
+MAX_WORDS = 12
+
+RULE_CONFIDENCE = 0.95
+
+
+class RuleClassifier:
+    """
+    Keyword fast path in front of BERT. Answers only when exactly one
+    intent matches a short message; anything else is ambiguous and
+    returns None so the caller falls through to the model.
+    """
+
+    def __init__(self, patterns=INTENT_PATTERNS, max_words=MAX_WORDS):
+        self.max_words = max_words
+        self.compiled = {
+            intent: re.compile("|".join(f"(?:{p})" for p in group),
+                               re.IGNORECASE)
+            for intent, group in patterns.items()
+        }
+
+    def classify(self, text):
+        """
+        Returns (intent, confidence) for a confident match, else None.
+        """
+        if len(text.split()) > self.max_words:
+            return None
+
+        matched = {
+            intent
+            for intent, pattern in self.compiled.items()
+            if pattern.search(text)
+        }
+
+        for specific, generic in OVERRIDES.items():
+            if specific in matched:
+                matched.discard(generic)
+
+        if len(matched) != 1:
+            return None
+
+        return matched.pop(), RULE_CONFIDENCE
@@ -0,0 +1,369 @@
+"""
+Bulk ingestion of past lab reports (PDFs and photos).
+
+Usage (from the repo root):
+    python ingest_reports.py /path/to/clinic_reports -o reports.jsonl
+    python ingest_reports.py /path/to/clinic_reports -o reports.jsonl \\
+        --workers 8 --parquet reports.parquet
+
+Walks the directory, runs extract_text_from_file + map_medical_data on
+every report across a process pool and appends one JSON line per file
+(mapped fields, per-stage timings, errors). The output file doubles as
+the checkpoint: rerunning with the same -o skips files already in it
+(--retry-errors appends a fresh record for failed files; the last
+record for a path wins).
+
+Memory stays bounded: the walk is lazy, at most --max-in-flight files
+are queued at once, every record is written as soon as it is done and
+the resume checkpoint is looked up in an on-disk index rather than
+held as a set of paths.
+"""
+import argparse
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import utils.file_parser as file_parser
+from utils.file_parser import extract_text_from_file
+from utils.medical_mapper import map_medical_data
+
+# ======================================
+# CONFIGURATION
+# ======================================
+FILE_TYPES = {
+    ".pdf": "application/pdf",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+
+TASKS_PER_WORKER = 200        # recycle workers to cap leaked memory
+PROGRESS_INTERVAL = 1.0       # seconds between throughput lines
+PARQUET_BATCH_ROWS = 1000
+
+
+class LocalFile(io.BytesIO):
+    """
+    A file on disk shaped like a Streamlit UploadedFile, which is what
+    extract_text_from_file expects.
+    """
+
+    def __init__(self, path, file_type):
+        with open(path, "rb") as f:
+            super().__init__(f.read())
+        self.name = os.path.basename(path)
+        self.type = file_type
+
+
+# ======================================
+# WALK + CHECKPOINT
+# ======================================
+
+def walk_reports(root):
+    """
+    Yield report paths under root in a stable order, one directory at
+    a time, so the walk never holds the whole tree in memory.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in FILE_TYPES:
+                yield os.path.join(dirpath, name)
+
+
+class Checkpoint:
+    """
+    Paths already recorded in the output file, indexed in a temporary
+    SQLite file next to it so lookups don't hold every path in memory.
+    A half-written last line (from a crash) is ignored and the file is
+    processed again (ingest() cuts that line off before appending);
+    with retry_errors, so are files whose last record is an error.
+    """
+
+    def __init__(self, output_path, retry_errors=False):
+        self.retry_errors = retry_errors
+        fd, self.index_path = tempfile.mkstemp(
+            prefix=".ingest-", suffix=".sqlite",
+            dir=os.path.dirname(os.path.abspath(output_path))
+        )
+        os.close(fd)
+
+        self.db = sqlite3.connect(self.index_path)
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute(
+            "CREATE TABLE done (path TEXT PRIMARY KEY, failed INTEGER)"
+        )
+
+        if os.path.exists(output_path):
+            with open(output_path, encoding="utf-8") as f, self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO done VALUES (?, ?)",
+                    self._records(f)
+                )
+
+    @staticmethod
+    def _records(lines):
+        for line in lines:
+            try:
+                record = json.loads(line)
+                yield record["path"], record["status"] == "error"
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    def __contains__(self, path):
+        row = self.db.execute(
+            "SELECT failed FROM done WHERE path = ?", (path,)
+        ).fetchone()
+        return row is not None and not (self.retry_errors and row[0])
+
+    def close(self):
+        self.db.close()
+        os.remove(self.index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def drop_partial_line(path, chunk_size=64 * 1024):
+    """
+    Truncate a crash-interrupted last line (no trailing newline), so
+    the next record appended doesn't get glued onto it.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+
+        # Walk back to the last complete line
+        pos = end
+        while pos > 0:
+            start = max(0, pos - chunk_size)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+
+# ======================================
+# WORKER
+# ======================================
+
+# Set per worker by _init_worker; the default covers in-process calls
+_ocr_profile = "default"
+
+
+def _init_worker(ocr_profile):
+    # Files are the unit of parallelism here; don't nest a page pool
+    file_parser.PDF_WORKERS = 1
+    global _ocr_profile
+    _ocr_profile = ocr_profile
+
+
+def process_file(path):
+    record = {
+        "path": path,
+        "bytes": None,
+        "status": "ok",
+        "error": None,
+        "extract_ms": None,
+        "map_ms": None,
+        "chars": 0,
+        "fields": {},
+    }
+
+    try:
+        file_type = FILE_TYPES[os.path.splitext(path)[1].lower()]
+        uploaded = LocalFile(path, file_type)
+        record["bytes"] = len(uploaded.getvalue())
+
+        start = time.perf_counter()
+        text = extract_text_from_file(
+            uploaded, ocr_profile=_ocr_profile, raise_errors=True
+        )
+        record["extract_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        record["chars"] = len(text)
+
+        if not text:
+            record["status"] = "empty"
+            return record
+
+        start = time.perf_counter()
+        record["fields"] = map_medical_data(text)
+        record["map_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    return record
+
+
+# ======================================
+# PIPELINE
+# ======================================
+
+class Progress:
+    def __init__(self, skipped):
+        self.started = time.perf_counter()
+        self.last_print = 0.0
+        self.skipped = skipped
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+
+    def update(self, record):
+        self.files += 1
+        self.bytes += record["bytes"] or 0
+        if record["status"] == "error":
+            self.errors += 1
+
+    def report(self, force=False):
+        now = time.perf_counter()
+        if not force and now - self.last_print < PROGRESS_INTERVAL:
+            return
+        self.last_print = now
+
+        elapsed = max(now - self.started, 1e-9)
+        print(
+            f"\r{self.files} files  {self.files / elapsed:.1f} files/s  "
+            f"{self.bytes / elapsed / 1e6:.2f} MB/s  "
+            f"{self.errors} errors  {self.skipped} skipped",
+            end="", file=sys.stderr, flush=True
+        )
+
+
+def ingest(root, output_path, workers, max_in_flight, ocr_profile,
+           retry_errors=False):
+    progress = Progress(skipped=0)
+    drop_partial_line(output_path)
+
+    with Checkpoint(output_path, retry_errors) as done, \
+            open(output_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(ocr_profile,),
+        max_tasks_per_child=TASKS_PER_WORKER,
+    ) as pool:
+        in_flight = set()
+
+        def drain():
+            """
+            Wait for at least one file and write every finished record.
+            """
+            nonlocal in_flight
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                progress.update(record)
+            out.flush()
+            progress.report()
+
+        for path in walk_reports(root):
+            if path in done:
+                progress.skipped += 1
+                continue
+            in_flight.add(pool.submit(process_file, path))
+            if len(in_flight) >= max_in_flight:
+                drain()
+
+        while in_flight:
+            drain()
+
+    progress.report(force=True)
+    print(file=sys.stderr)
+    return progress
+
+
+def jsonl_to_parquet(jsonl_path, parquet_path):
+    """
+    Convert the JSONL output in fixed-size row groups. Mapped fields
+    are kept as a JSON string column since they vary per report.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("Parquet output needs pyarrow (pip install pyarrow)")
+        return
+
+    schema = pa.schema([
+        ("path", pa.string()),
+        ("bytes", pa.int64()),
+        ("status", pa.string()),
+        ("error", pa.string()),
+        ("extract_ms", pa.float64()),
+        ("map_ms", pa.float64()),
+        ("chars", pa.int64()),
+        ("fields", pa.string()),
+    ])
+
+    def write(writer, rows):
+        columns = {name: [row.get(name) for row in rows] for name in schema.names}
+        columns["fields"] = [json.dumps(row.get("fields") or {}) for row in rows]
+        writer.write_table(pa.table(columns, schema=schema))
+
+    with pq.ParquetWriter(parquet_path, schema) as writer, \
+            open(jsonl_path, encoding="utf-8") as f:
+        rows = []
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+            if len(rows) >= PARQUET_BATCH_ROWS:
+                write(writer, rows)
+                rows = []
+        if rows:
+            write(writer, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("root", help="directory of PDFs / images")
+    parser.add_argument("-o", "--output", default="reports.jsonl",
+                        help="JSONL output, also the resume checkpoint")
+    parser.add_argument("--parquet", help="also write a Parquet copy here")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="queued files (default: 4 per worker)")
+    parser.add_argument("--ocr-profile", default="default",
+                        choices=sorted(file_parser.OCR_PROFILES))
+    parser.add_argument("--retry-errors", action="store_true",
+                        help="reprocess files that failed in an earlier run")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        parser.error(f"not a directory: {args.root}")
+
+    progress = ingest(
+        args.root, args.output, args.workers,
+        args.max_in_flight or args.workers * 4, args.ocr_profile,
+        args.retry_errors
+    )
+    print(f"Processed {progress.files} files ({progress.errors} errors), "
+          f"skipped {progress.skipped} already in {args.output}")
+
+    if args.parquet:
+        jsonl_to_parquet(args.output, args.parquet)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,9 @@ from utils.qr_generator import (
     get_public_link,
     get_nfc_instructions
 )
-from utils.pdf_generator import generate_medical_pdf
-from utils.file_parser import extract_text_from_file
-from utils.medical_mapper import map_medical_data
+from utils.pdf_cache import cached_medical_pdf
+from utils.errors import JobLimitError
+from utils.extraction_jobs import extraction_jobs
 
 # ===============================
 # PAGE CONFIG
@@ -83,18 +83,66 @@ uploaded_file = st.file_uploader(
     type=["pdf", "png", "jpg", "jpeg"]
 )
 
-auto_data = {}
-
+# Extraction runs in a background pool; only the job ID lives in the
+# session, and the fragment below polls it without blocking the page.
 if uploaded_file:
-    with st.spinner("Reading medical document..."):
-        extracted_text = extract_text_from_file(uploaded_file)
+    current = st.session_state.get("extraction_job")
+
+    if not current or current["upload"] != uploaded_file.file_id:
+        if current:
+            extraction_jobs.cancel(current["id"])
+        try:
+            job_id = extraction_jobs.submit(PATIENT_ID, uploaded_file)
+            st.session_state["extraction_job"] = {
+                "id": job_id,
+                "upload": uploaded_file.file_id
+            }
+        except JobLimitError as e:
+            st.session_state.pop("extraction_job", None)
+            st.warning(f"⏳ {e}")
+else:
+    st.session_state.pop("extraction_job", None)
+
+
+def is_pending(job):
+    return job is not None and job["status"] in ("queued", "running")
+
+
+@st.fragment(run_every=2)
+def poll_extraction_job(job_id):
+    # Only rendered while the job is pending; once it finishes, one
+    # full rerun shows the result and this fragment stops polling
+    if not is_pending(extraction_jobs.get(job_id)):
+        st.rerun()
+    st.info("⏳ Reading medical document... you can keep using the page.")
 
-    if extracted_text:
+
+def show_extraction_result(job):
+    if job is None:
+        st.warning("⚠️ Extraction result expired. Please upload again.")
+    elif job["status"] == "failed":
+        st.error(f"❌ Could not read document: {job['error']}")
+    elif job["status"] == "done" and not job["text"]:
+        st.warning(
+            "⚠️ No text could be read from this document. "
+            "Try a clearer scan or photo."
+        )
+    elif job["text"]:
         st.subheader("📄 Extracted Text (Review)")
-        st.text_area("Detected text", extracted_text, height=220)
+        st.text_area("Detected text", job["text"], height=220)
+        if job.get("warning"):
+            st.warning(f"⚠️ {job['warning']}")
+        else:
+            st.success("✅ Document read, please review the text above")
 
-        auto_data = map_medical_data(extracted_text)
-        st.success("✅ Medical data detected automatically")
+
+current = st.session_state.get("extraction_job")
+if current:
+    job = extraction_jobs.get(current["id"])
+    if is_pending(job):
+        poll_extraction_job(current["id"])
+    else:
+        show_extraction_result(job)
 
 st.divider()
 
@@ -301,11 +349,9 @@ st.image(
 st.code(get_public_link(PATIENT_ID))
 st.markdown(get_nfc_instructions())
 
-pdf = generate_medical_pdf(patient)
-
 st.download_button(
     "📄 Download Complete Medical PDF",
-    pdf,
+    lambda: cached_medical_pdf(patient),
     file_name=f"Medical_{PATIENT_ID}.pdf",
     mime="application/pdf"
 )
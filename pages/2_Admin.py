@@ -1,12 +1,21 @@
 import streamlit as st
 import requests
-from utils.pdf_generator import generate_medical_pdf
+import time
+from functools import partial
+from pathlib import Path
+from utils.pdf_cache import cached_medical_pdf, pdf_cache
+from utils.bulk_export import export_jobs
+from utils.errors import JobLimitError
+from utils.records_client import RecordsClient
 
 st.set_page_config(page_title="Admin Panel | QURE", page_icon="🛠️", layout="wide")
 
 API_PATIENTS = "https://emergency-health-locker.onrender.com/api/patients"
 API_RECORDS = "https://emergency-health-locker.onrender.com/api/records"
 
+PAGE_SIZE = 50
+EXPORT_PAGE_SIZE = 200     # server maximum
+
 # ===============================
 # AUTH CHECK
 # ===============================
@@ -17,28 +26,186 @@ if not st.session_state.get("logged_in") or st.session_state.get("role") != "ADM
 ADMIN_SECRET = st.secrets.get("ADMIN_SECRET", "admin123")
 HEADERS = {"x-admin-key": ADMIN_SECRET}
 
+# Kept per session so it remembers whether the batch endpoint exists
+if "records_client" not in st.session_state:
+    st.session_state["records_client"] = RecordsClient(API_RECORDS, HEADERS)
+records_client = st.session_state["records_client"]
+
 st.title("🛠️ Admin Panel")
 st.divider()
 
+
+# ===============================
+# API HELPERS
+# ===============================
+def fetch_patient_page(cursor=None, search="", fields="summary", limit=PAGE_SIZE):
+    params = {"limit": limit, "fields": fields}
+    if cursor:
+        params["cursor"] = cursor
+    if search:
+        params["q"] = search
+
+    r = requests.get(API_PATIENTS, params=params, headers=HEADERS, timeout=10)
+    r.raise_for_status()
+    return r.json()
+
+
+def fetch_patient(pid):
+    r = requests.get(f"{API_PATIENTS}/{pid}", headers=HEADERS, timeout=10)
+    r.raise_for_status()
+    return r.json()
+
+
+def iter_full_patients(search=""):
+    """
+    Every matching patient with all fields, one server page at a time.
+    """
+    cursor = None
+    while True:
+        page = fetch_patient_page(cursor, search, "full", EXPORT_PAGE_SIZE)
+        yield from page["patients"]
+        cursor = page.get("next_cursor")
+        if not cursor:
+            return
+
+
+def summary_pdf(pid):
+    return cached_medical_pdf(fetch_patient(pid))
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def patient_total():
+    """
+    Size of the whole collection, for exports while a search is active.
+    """
+    return fetch_patient_page(limit=1).get("total", 0)
+
+
+# ===============================
+# FETCH PATIENTS (ONE PAGE)
+# ===============================
+search = st.text_input("Search by ID or Name").strip()
+
+# Cursors of the pages before the current one; reset on a new search
+if st.session_state.get("patient_search") != search:
+    st.session_state["patient_search"] = search
+    st.session_state["patient_cursors"] = [None]
+
+cursors = st.session_state["patient_cursors"]
+
+try:
+    page = fetch_patient_page(cursors[-1], search)
+except requests.exceptions.RequestException:
+    page = {"patients": [], "next_cursor": None, "total": None}
+    st.error("❌ Unable to load patients")
+
+patients = page["patients"]
+
+# Only the first page of a listing carries the total; keep it while paging
+if cursors[-1] is None or page.get("total") is not None:
+    st.session_state["patient_total"] = page.get("total")
+total = st.session_state.get("patient_total")
+if total is None:
+    total = len(patients)
+
+st.success(f"{'Matching' if search else 'Total'} Patients: {total}")
+
 # ===============================
-# FETCH PATIENTS
+# BULK EXPORT (SUMMARY PDFs → ZIP)
 # ===============================
-res = requests.get(API_PATIENTS, headers=HEADERS)
-patients = res.json().get("patients", []) if res.status_code == 200 else []
+with st.expander("📦 Export Summary PDFs"):
+    scope = st.radio(
+        "Patients to export",
+        ["All patients", "Search results", "Selected patients"],
+        horizontal=True
+    )
+
+    if scope == "All patients":
+        source = lambda: iter_full_patients()
+        if not search:
+            count = total
+        else:
+            # The page total only counts search matches
+            try:
+                count = patient_total()
+            except requests.exceptions.RequestException:
+                count = 0
+                st.error("❌ Unable to count patients")
+    elif scope == "Search results":
+        count = total
+        source = lambda: iter_full_patients(search)
+    else:
+        chosen = st.multiselect(
+            "Patient IDs (this page)",
+            [p["Patient_ID"] for p in patients if p.get("Patient_ID")]
+        )
+        count = len(chosen)
+        source = lambda: (fetch_patient(pid) for pid in chosen)
+
+    if st.button(f"🚀 Export {count} PDFs", disabled=not count):
+        try:
+            st.session_state["export_job"] = export_jobs.start(
+                source(), total=count
+            )
+        except JobLimitError as e:
+            st.warning(f"⏳ {e}")
 
-st.success(f"Total Patients: {len(patients)}")
+    @st.fragment(run_every=1)
+    def poll_export_job(job_id):
+        # Only rendered while the export runs; once it stops, one full
+        # rerun shows the result and this fragment stops polling
+        job = export_jobs.get(job_id)
+        if not job or job["status"] != "running":
+            st.rerun()
 
-search = st.text_input("Search by ID or Name")
-if search:
-    search = search.lower()
-    patients = [
-        p for p in patients
-        if search in (p.get("Patient_ID","")+p.get("Name","")).lower()
-    ]
+        elapsed = max(time.time() - job["started"], 1e-6)
+        st.progress(
+            min(job["done"] / max(job["total"], 1), 1.0),
+            text=f"{job['done']}/{job['total']} PDFs • "
+                 f"{job['done'] / elapsed:.0f} PDFs/s"
+        )
+        if st.button("✖️ Cancel export"):
+            export_jobs.cancel(job_id)
+
+    def show_export_result(job_id, job):
+        if job["status"] == "done":
+            st.success(
+                f"✅ Exported {job['done'] - job['failed']} PDFs"
+                + (f" ({job['failed']} failed, see errors.txt)" if job["failed"] else "")
+            )
+            # One button per part; each reads only its own ZIP on click
+            parts = job["paths"]
+            for n, path in enumerate(parts, start=1):
+                st.download_button(
+                    f"⬇️ Download ZIP {n}/{len(parts)}",
+                    Path(path).read_bytes,
+                    file_name=f"medical_summaries_{n:03d}.zip",
+                    mime="application/zip",
+                    key=f"export_part_{job_id}_{n}"
+                )
+        elif job["status"] == "cancelled":
+            st.info("Export cancelled")
+        else:
+            st.error(f"❌ Export failed: {job['error']}")
+
+    export_job_id = st.session_state.get("export_job")
+    export_job = export_jobs.get(export_job_id) if export_job_id else None
+    if export_job and export_job["status"] == "running":
+        poll_export_job(export_job_id)
+    elif export_job:
+        show_export_result(export_job_id, export_job)
 
 # ===============================
 # PATIENT LIST + MEDICAL HISTORY
 # ===============================
+if not patients:
+    st.info("No patients found")
+
+# Medical history for the whole page in one request
+records_by_pid, records_stats = records_client.fetch(
+    [p.get("Patient_ID") for p in patients]
+)
+
 for p in patients:
     with st.container(border=True):
         st.markdown(f"### {p.get('Name','Unknown')}")
@@ -55,28 +222,53 @@ for p in patients:
             if not pid:
                 st.info("No patient ID")
             else:
-                r = requests.get(f"{API_RECORDS}/{pid}", headers=HEADERS)
-                if r.status_code == 200:
-                    records = r.json()
-                    if not records:
-                        st.info("No records uploaded")
-                    else:
-                        for rec in records:
-                            col1, col2 = st.columns([3,1])
-                            with col1:
-                                st.markdown(f"**{rec['Record_Title']}**")
-                                st.caption(f"{rec['Record_Type']} • {rec['File_Name']}")
-                            with col2:
-                                st.markdown(
-                                    f"[⬇️ Download]({API_RECORDS}/download/{rec['_id']})",
-                                    unsafe_allow_html=True
-                                )
-
-                # 📄 FULL SUMMARY PDF
-                pdf = generate_medical_pdf(p)
+                records = records_by_pid.get(pid)
+                if records is None:
+                    st.error("❌ Unable to load records")
+                elif not records:
+                    st.info("No records uploaded")
+                else:
+                    for rec in records:
+                        col1, col2 = st.columns([3,1])
+                        with col1:
+                            st.markdown(f"**{rec['Record_Title']}**")
+                            st.caption(f"{rec['Record_Type']} • {rec['File_Name']}")
+                        with col2:
+                            st.markdown(
+                                f"[⬇️ Download]({API_RECORDS}/download/{rec['_id']})",
+                                unsafe_allow_html=True
+                            )
+
+                # 📄 FULL SUMMARY PDF (rendered only when downloaded)
                 st.download_button(
                     "📄 Download Medical Summary PDF",
-                    pdf,
+                    partial(summary_pdf, pid),
                     file_name=f"{pid}_summary.pdf",
-                    mime="application/pdf"
+                    mime="application/pdf",
+                    key=f"summary_pdf_{pid}"
                 )
+
+# ===============================
+# PAGINATION
+# ===============================
+col1, col2, col3 = st.columns([1, 4, 1])
+with col1:
+    if st.button("⬅️ Previous", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+with col2:
+    st.caption(f"Page {len(cursors)} • {PAGE_SIZE} per page")
+with col3:
+    if st.button("Next ➡️", disabled=not page.get("next_cursor")):
+        cursors.append(page["next_cursor"])
+        st.rerun()
+
+stats = pdf_cache.summary()
+st.caption(
+    f"PDF cache: {stats['hits']} hits • {stats['misses']} misses • "
+    f"{stats['entries']} cached"
+)
+st.caption(
+    f"Medical history: {records_stats['round_trips']} request(s) • "
+    f"{records_stats['seconds'] * 1000:.0f} ms ({records_stats['mode']})"
+)
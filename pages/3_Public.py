@@ -1,6 +1,6 @@
 import streamlit as st
 import requests
-from utils.pdf_generator import generate_medical_pdf
+from utils.pdf_cache import cached_medical_pdf
 
 st.set_page_config(
     page_title="Emergency Medical Info | QURE",
@@ -48,10 +48,9 @@ st.success(f"Patient: {patient.get('Name')}")
 st.metric("Blood Group", patient.get("Blood_Type", "N/A"))
 st.metric("Emergency Contact", patient.get("Emergency_Contacts", "N/A"))
 
-pdf = generate_medical_pdf(patient)
 st.download_button(
     "Download Medical PDF",
-    pdf,
+    lambda: cached_medical_pdf(patient),
     file_name=f"Emergency_{patient_id}.pdf",
     mime="application/pdf"
 )
@@ -18,12 +18,20 @@ function logout() {
   window.location.href = "index.html";
 }
 
-// ================= LOAD PATIENTS =================
+// ================= LOAD PATIENTS (ONE PAGE AT A TIME) =================
 let allPatients = [];
+let nextCursor = null;
+let totalPatients = null;   // sent with the first page only
+let searchTimer = null;
+
+async function loadPatients(append = false) {
+  const params = new URLSearchParams();
+  const q = search.value.trim();
+  if (q) params.set("q", q);
+  if (append && nextCursor) params.set("cursor", nextCursor);
 
-async function loadPatients() {
   try {
-    const res = await fetch(API_PATIENTS, {
+    const res = await fetch(`${API_PATIENTS}?${params}`, {
       headers: {
         "x-admin-key": ADMIN_SECRET
       }
@@ -35,9 +43,12 @@ async function loadPatients() {
     }
 
     const data = await res.json();
-    allPatients = data.patients || [];
+    const page = data.patients || [];
+    allPatients = append ? allPatients.concat(page) : page;
+    nextCursor = data.next_cursor || null;
 
-    count.innerText = allPatients.length;
+    if (!append) totalPatients = data.total ?? null;
+    count.innerText = totalPatients ?? allPatients.length;
     renderPatients(allPatients);
   } catch (err) {
     console.error("Failed to load patients", err);
@@ -82,15 +93,18 @@ function renderPatients(list) {
       </div>
     `;
   });
+
+  if (nextCursor) {
+    patients.innerHTML += `
+      <button onclick="loadPatients(true)">⬇️ Load more</button>
+    `;
+  }
 }
 
-// ================= SEARCH =================
+// ================= SEARCH (SERVER-SIDE) =================
 function filterPatients() {
-  const q = search.value.toLowerCase();
-  const filtered = allPatients.filter(p =>
-    (p.Patient_ID + p.Name).toLowerCase().includes(q)
-  );
-  renderPatients(filtered);
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(() => loadPatients(), 300);
 }
 
 // ================= LOAD MEDICAL RECORDS =================
@@ -0,0 +1,249 @@
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.errors import JobLimitError
+from utils.pdf_generator import generate_medical_pdf
+
+# ===============================
+# EXPORT CONFIG
+# ===============================
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", os.cpu_count() or 1))
+EXPORT_CHUNK_SIZE = 64          # patients per task sent to a worker
+# PDFs per ZIP part (~40 KB each), so a download never loads more than
+# one part into the app's memory
+EXPORT_PART_SIZE = int(os.environ.get("EXPORT_PART_SIZE", 500))
+MAX_RUNNING_EXPORTS = int(os.environ.get("MAX_RUNNING_EXPORTS", 1))
+EXPORT_DIR = os.environ.get(
+    "EXPORT_DIR", os.path.join(tempfile.gettempdir(), "qure_exports")
+)
+EXPORT_TTL_SECONDS = 60 * 60    # finished ZIPs are deleted after this
+
+
+def _render_chunk(patients):
+    """
+    Worker: render one chunk. Returns [(patient_id, pdf or None, error)].
+    """
+    rendered = []
+    for patient in patients:
+        pid = patient.get("Patient_ID") or "unknown"
+        try:
+            rendered.append((pid, generate_medical_pdf(patient), None))
+        except Exception as e:
+            rendered.append((pid, None, str(e)))
+    return rendered
+
+
+def _entry_name(patient_id):
+    """
+    Patient ID made safe for a ZIP entry name: no path separators,
+    dots or control characters, and a bounded length.
+    """
+    safe = re.sub(r"[^A-Za-z0-9_-]+", "_", str(patient_id)).strip("_")
+    return safe[:64] or "unknown"
+
+
+def _chunks(patients, size):
+    chunk = []
+    for patient in patients:
+        chunk.append(patient)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ExportJobs:
+    """
+    Bulk summary-PDF exports, shared by every session in this process.
+
+    Each export renders in a process pool and streams PDFs into ZIPs on
+    disk as chunks finish, starting a new ZIP every part_size PDFs; at
+    most 2 chunks per worker are in memory at once, so memory stays flat
+    however many patients are exported.
+    """
+
+    def __init__(self, workers=EXPORT_WORKERS, chunk_size=EXPORT_CHUNK_SIZE,
+                 part_size=EXPORT_PART_SIZE, max_running=MAX_RUNNING_EXPORTS,
+                 export_dir=EXPORT_DIR, ttl=EXPORT_TTL_SECONDS):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.part_size = part_size
+        self.max_running = max_running
+        self.export_dir = export_dir
+        self.ttl = ttl
+
+        self._jobs = {}
+        self._cancel = {}
+        self._lock = threading.Lock()
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl
+        for job_id, job in list(self._jobs.items()):
+            if job["finished"] and job["finished"] < cutoff:
+                for path in job["paths"]:
+                    if os.path.exists(path):
+                        os.remove(path)
+                del self._jobs[job_id]
+                self._cancel.pop(job_id, None)
+
+    def start(self, patients, total=None, label="summaries"):
+        """
+        Start exporting an iterable of patient dicts. total is only used
+        for progress when patients is a generator. Returns the job ID.
+        """
+        if total is None:
+            total = len(patients)
+
+        with self._lock:
+            self._purge()
+            running = [j for j in self._jobs.values() if j["status"] == "running"]
+            if len(running) >= self.max_running:
+                raise JobLimitError(
+                    "Another export is already running. "
+                    "Please wait for it to finish or cancel it."
+                )
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "label": label,
+                "status": "running",
+                "total": total,
+                "done": 0,
+                "failed": 0,
+                "paths": [],
+                "error": None,
+                "started": time.time(),
+                "finished": None,
+            }
+            self._cancel[job_id] = threading.Event()
+
+        threading.Thread(
+            target=self._run, args=(job_id, patients),
+            name=f"export-{job_id[:8]}", daemon=True
+        ).start()
+        return job_id
+
+    def _run(self, job_id, patients):
+        os.makedirs(self.export_dir, exist_ok=True)
+        cancel = self._cancel[job_id]
+        paths = []
+        errors = []
+        part = {"zip": None, "tmp": None, "names": set(), "count": 0}
+
+        def close_part():
+            if part["zip"] is None:
+                return
+            part["zip"].close()
+            path = part["tmp"][:-len(".part")]
+            os.replace(part["tmp"], path)
+            paths.append(path)
+            part["zip"] = None
+
+        def open_part():
+            # PDFs are already compressed; storing them keeps the writer
+            # from becoming the bottleneck
+            part["tmp"] = os.path.join(
+                self.export_dir, f"{job_id}_{len(paths) + 1:03d}.zip.part"
+            )
+            part["zip"] = zipfile.ZipFile(part["tmp"], "w", zipfile.ZIP_STORED)
+            part["names"] = set()
+            part["count"] = 0
+
+        def write(rendered):
+            for pid, pdf, error in rendered:
+                if pdf is None:
+                    errors.append(f"{pid}: {error}")
+                    continue
+                if part["zip"] is None:
+                    open_part()
+
+                base = _entry_name(pid)
+                name = f"{base}_summary.pdf"
+                n = 1
+                while name in part["names"]:
+                    n += 1
+                    name = f"{base}_summary_{n}.pdf"
+                part["names"].add(name)
+                part["zip"].writestr(name, pdf)
+
+                part["count"] += 1
+                if part["count"] >= self.part_size:
+                    close_part()
+
+            with self._lock:
+                job = self._jobs[job_id]
+                job["done"] += len(rendered)
+                job["failed"] = len(errors)
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                in_flight = deque()
+
+                for chunk in _chunks(patients, self.chunk_size):
+                    if cancel.is_set():
+                        break
+                    in_flight.append(pool.submit(_render_chunk, chunk))
+                    if len(in_flight) >= self.workers * 2:
+                        write(in_flight.popleft().result())
+
+                while in_flight and not cancel.is_set():
+                    write(in_flight.popleft().result())
+
+                for future in in_flight:
+                    future.cancel()
+
+            if not cancel.is_set():
+                if errors:
+                    if part["zip"] is None:
+                        open_part()
+                    part["zip"].writestr("errors.txt", "\n".join(errors) + "\n")
+                close_part()
+            status, error = ("cancelled" if cancel.is_set() else "done"), None
+
+        except Exception as e:
+            status, error = "failed", str(e)
+
+        if status != "done":
+            if part["zip"] is not None:
+                part["zip"].close()
+                os.remove(part["tmp"])
+            for path in paths:
+                os.remove(path)
+            paths = []
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = status
+            job["error"] = error
+            job["paths"] = paths
+            job["finished"] = time.time()
+
+    def get(self, job_id):
+        """
+        Snapshot of an export, or None if unknown / expired.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def cancel(self, job_id):
+        """
+        Stop after the chunks already rendering; the ZIPs written so far
+        are deleted.
+        """
+        event = self._cancel.get(job_id)
+        if event is not None:
+            event.set()
+
+
+# Shared by every Streamlit session served by this process
+export_jobs = ExportJobs()
@@ -0,0 +1,18 @@
+class JobLimitError(Exception):
+    """
+    A background job (report extraction, bulk export) was refused
+    because too many are already queued or running.
+    """
+
+
+class ExtractionTruncatedError(Exception):
+    """
+    Document extraction stopped early (memory limit reached). What was
+    read before it stopped is kept: `pages` on the page-level calls,
+    `text` on the text-level ones.
+    """
+
+    def __init__(self, message, pages=None, text=""):
+        super().__init__(message)
+        self.pages = pages
+        self.text = text
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from utils.file_parser import EXTRACTOR_VERSION, extract_text_from_file
+
+# ===============================
+# CACHE CONFIG
+# ===============================
+MEMORY_MAX_ENTRIES = 128
+DISK_CACHE_DIR = os.environ.get("EXTRACTION_CACHE_DIR")   # unset = off
+DISK_MAX_BYTES = int(os.environ.get("EXTRACTION_CACHE_DISK_MB", 200)) * 1024 * 1024
+
+
+def content_key(data, ocr_profile="default"):
+    """
+    Cache key: file content hash + extractor version + OCR profile,
+    so a new extractor release never serves stale text.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{digest}-v{EXTRACTOR_VERSION}-{ocr_profile}"
+
+
+class ExtractionCache:
+    """
+    Two-tier cache of extracted document text.
+
+    memory: LRU shared by every session in this process.
+    disk:   optional directory of text files, evicted oldest-first
+            once the total size passes max_disk_bytes.
+    """
+
+    def __init__(self, max_entries=MEMORY_MAX_ENTRIES, disk_dir=DISK_CACHE_DIR,
+                 max_disk_bytes=DISK_MAX_BYTES):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.txt")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+                os.utime(path)   # mark as recently used
+            except OSError:
+                text = None
+
+            if text is not None:
+                self._remember(key, text)
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                return text
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key, text):
+        self._remember(key, text)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, path)
+                self._evict_disk()
+            except OSError as e:
+                print("Extraction cache write error:", e)
+
+    def _remember(self, key, text):
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+# Shared by every Streamlit session served by this process
+extraction_cache = ExtractionCache()
+
+
+def cached_extract_text(uploaded_file, ocr_profile="default", raise_errors=False):
+    """
+    extract_text_from_file, run once per distinct document.
+    Empty results (including failed extractions) are not cached.
+    """
+    key = content_key(uploaded_file.getvalue(), ocr_profile)
+
+    text = extraction_cache.get(key)
+    if text is not None:
+        return text
+
+    uploaded_file.seek(0)
+    text = extract_text_from_file(
+        uploaded_file, ocr_profile=ocr_profile, raise_errors=raise_errors
+    )
+    if text:
+        extraction_cache.put(key, text)
+
+    return text
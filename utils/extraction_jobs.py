@@ -0,0 +1,162 @@
+import io
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.errors import ExtractionTruncatedError, JobLimitError
+from utils.extraction_cache import cached_extract_text
+
+# ===============================
+# JOB LIMITS
+# ===============================
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", 2))
+MAX_JOBS_PER_USER = int(os.environ.get("EXTRACTION_MAX_JOBS_PER_USER", 1))
+MAX_JOBS_PER_SERVER = int(os.environ.get("EXTRACTION_MAX_JOBS", 16))
+JOB_RESULT_TTL_SECONDS = 15 * 60   # finished jobs are forgotten after this
+
+
+class _UploadCopy(io.BytesIO):
+    """
+    Detached copy of a Streamlit upload, safe to read from a worker
+    thread after the script run that received it has finished.
+    """
+
+    def __init__(self, uploaded_file):
+        super().__init__(uploaded_file.getvalue())
+        self.name = uploaded_file.name
+        self.type = uploaded_file.type
+
+
+class ExtractionJobs:
+    """
+    Bounded background pool for report extraction, shared by every
+    session in this process.
+
+    At most `workers` documents are extracted at once. A user may have
+    `max_per_user` jobs queued or running, and the server as a whole
+    `max_jobs`; submit() raises JobLimitError past either cap.
+    """
+
+    def __init__(self, workers=EXTRACTION_WORKERS, max_per_user=MAX_JOBS_PER_USER,
+                 max_jobs=MAX_JOBS_PER_SERVER, result_ttl=JOB_RESULT_TTL_SECONDS):
+        self.max_per_user = max_per_user
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="extraction"
+        )
+        self._jobs = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _active(self, user_id=None):
+        return [
+            job for job in self._jobs.values()
+            if job["status"] in ("queued", "running")
+            and (user_id is None or job["user"] == user_id)
+        ]
+
+    def _purge(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job["finished"] and job["finished"] < cutoff:
+                del self._jobs[job_id]
+                self._futures.pop(job_id, None)
+
+    def submit(self, user_id, uploaded_file, ocr_profile="default"):
+        """
+        Queue extraction of an upload. Returns the job ID.
+        """
+        with self._lock:
+            self._purge()
+
+            if len(self._active(user_id)) >= self.max_per_user:
+                raise JobLimitError(
+                    "You already have a document being read. "
+                    "Please wait for it to finish."
+                )
+            if len(self._active()) >= self.max_jobs:
+                raise JobLimitError(
+                    "The server is busy reading other documents. "
+                    "Please try again in a minute."
+                )
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "user": user_id,
+                "file": uploaded_file.name,
+                "status": "queued",
+                "text": None,
+                "error": None,
+                "warning": None,
+                "submitted": time.time(),
+                "started": None,
+                "finished": None,
+            }
+
+        copy = _UploadCopy(uploaded_file)
+        future = self._pool.submit(self._run, job_id, copy, ocr_profile)
+        with self._lock:
+            self._futures[job_id] = future
+        return job_id
+
+    def _run(self, job_id, uploaded_file, ocr_profile):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return
+            job["status"] = "running"
+            job["started"] = time.time()
+
+        warning = None
+        try:
+            text = cached_extract_text(
+                uploaded_file, ocr_profile=ocr_profile, raise_errors=True
+            )
+            status, error = "done", None
+        except ExtractionTruncatedError as e:
+            # Partial text is still worth reviewing; not cached
+            text, status, error = e.text.strip(), "done", None
+            warning = str(e)
+        except Exception as e:
+            text, status, error = None, "failed", str(e)
+
+        with self._lock:
+            job["text"] = text
+            job["status"] = status
+            job["error"] = error
+            job["warning"] = warning
+            job["finished"] = time.time()
+
+    def get(self, job_id):
+        """
+        Snapshot of a job, or None if unknown / expired.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def cancel(self, job_id):
+        """
+        Drop a job that hasn't started. Running jobs finish normally,
+        since extraction can't be interrupted mid-page.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+            if job is None or job["status"] != "queued":
+                return False
+            job["status"] = "cancelled"
+            job["finished"] = time.time()
+
+        if future is not None:
+            future.cancel()
+        return True
+
+
+# Shared by every Streamlit session served by this process
+extraction_jobs = ExtractionJobs()
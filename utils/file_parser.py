@@ -1,9 +1,584 @@
 import pdfplumber
-from PIL import Image
+from PIL import Image, ImageOps
 import pytesseract
 import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
 
-def extract_text_from_file(uploaded_file):
+from utils.errors import ExtractionTruncatedError
+
+try:
+    import tesserocr
+except ImportError:          # optional: in-process Tesseract bindings
+    tesserocr = None
+
+# Bump when extraction output changes, so cached text is not reused
+EXTRACTOR_VERSION = 3
+
+# ===============================
+# PDF EXTRACTION LIMITS
+# ===============================
+PDF_MAX_PAGES = 300            # pages beyond this are ignored
+PDF_TIMEOUT_SECONDS = 60       # per document, parallel mode
+PARALLEL_MIN_PAGES = 8         # smaller PDFs are read serially
+PDF_WORKERS = os.cpu_count() or 1
+MIN_TEXT_LAYER_CHARS = 20      # fewer means a scanned page -> OCR
+
+# Stop streaming extraction once the process RSS passes this (unset = off)
+PDF_MEMORY_LIMIT_MB = (
+    int(os.environ["PDF_MEMORY_LIMIT_MB"])
+    if os.environ.get("PDF_MEMORY_LIMIT_MB") else None
+)
+
+# ===============================
+# OCR PREPROCESSING
+# ===============================
+OCR_TARGET_DPI = 300
+OCR_PAGE_WIDTH_INCHES = 8.27   # A4; phone photos carry no real DPI
+OCR_DESKEW_MAX_ANGLE = 5.0     # degrees searched either side
+OCR_DESKEW_STEP = 0.5
+
+# Must keep every character utils.lab_analytes reads: comparators and
+# "=" before values, and units such as 10^3/ul and µmol/l (OCR emits
+# either the micro sign or Greek mu)
+LAB_REPORT_WHITELIST = (
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz"
+    "0123456789.,:;%/()+-<>=^µμ"
+)
+
+# Tesseract configs per profile. "fast" treats the image as one block
+# of text and only looks for characters that appear in lab reports.
+OCR_PROFILES = {
+    "default": "",
+    "fast": f"--oem 1 --psm 6 -c tessedit_char_whitelist={LAB_REPORT_WHITELIST}",
+}
+
+# ===============================
+# OCR ENGINES
+# ===============================
+# "auto" uses the tesserocr pool when the bindings are installed and
+# Tesseract initialises, and falls back to pytesseract (one tesseract
+# process per call) otherwise.
+OCR_ENGINE = os.environ.get("OCR_ENGINE", "auto")
+OCR_POOL_SIZE = int(os.environ.get("OCR_POOL_SIZE", os.cpu_count() or 1))
+OCR_LANG = "eng"
+
+# Same settings as OCR_PROFILES, for the in-process API
+# (psm 3 = fully automatic, 6 = single block; oem 3 = default, 1 = LSTM)
+TESSEROCR_PROFILES = {
+    "default": {"psm": 3, "oem": 3, "variables": {}},
+    "fast": {
+        "psm": 6,
+        "oem": 1,
+        "variables": {"tessedit_char_whitelist": LAB_REPORT_WHITELIST},
+    },
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return _pool
+
+
+def _retire_pool(pool):
+    """
+    Stop handing out a pool whose workers are stuck on a timed-out
+    document, and kill its processes so a hung page can't keep holding
+    a core and its memory. Other documents with work on the retired
+    pool get BrokenProcessPool and retry on a fresh one.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    # shutdown() drops the process table, so read it first
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False)
+    for process in processes:
+        process.terminate()
+
+
+def _extract_page(page, ocr_profile):
+    """
+    Use the page's text layer when it has one; otherwise rasterize the
+    page and OCR it. Returns (text, method) with method "text", "ocr",
+    or "ocr_failed" when OCR raised and the (short) text layer was kept,
+    so one bad page doesn't lose the rest of the document.
+    """
+    text = page.extract_text() or ""
+    if len(text.strip()) >= MIN_TEXT_LAYER_CHARS or ocr_profile is None:
+        return text, "text"
+
+    try:
+        image = page.to_image(resolution=OCR_TARGET_DPI).original
+        ocr_text, _ = ocr_image(image, profile=ocr_profile)
+    except Exception as e:
+        print(f"OCR error on page {page.page_number}: {e}")
+        return text, "ocr_failed"
+    return ocr_text, "ocr"
+
+
+def _extract_page_range(path, start, end, ocr_profile):
+    """
+    Worker: open the PDF at path and extract pages [start, end).
+    """
+    with pdfplumber.open(path) as pdf:
+        results = []
+        for i in range(start, end):
+            page = pdf.pages[i]
+            results.append(_extract_page(page, ocr_profile))
+            page.close()
+        return results
+
+
+def _page_count(data):
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return len(pdf.pages)
+
+
+def _rss_mb():
+    """
+    Current resident set size in MB, or None where /proc is missing.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def iter_pdf_pages(data, max_pages=PDF_MAX_PAGES, ocr_profile="default",
+                   memory_limit_mb=PDF_MEMORY_LIMIT_MB):
+    """
+    Stream a PDF given as bytes one page at a time, yielding
+    {"page": n, "method": ..., "text": ...}. Each page's parsed objects
+    are released before the next page is read, so memory does not grow
+    with page count.
+
+    With memory_limit_mb, extraction stops once RSS passes it: the
+    document is closed and ExtractionTruncatedError is raised after the
+    pages read so far, which are complete and can be kept.
+    """
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        pages = pdf.pages[:max_pages]
+        for i, page in enumerate(pages):
+            text, method = _extract_page(page, ocr_profile)
+            page.close()
+
+            yield {"page": i + 1, "method": method, "text": text}
+
+            if memory_limit_mb is not None and i + 1 < len(pages):
+                rss = _rss_mb()
+                if rss is not None and rss > memory_limit_mb:
+                    raise ExtractionTruncatedError(
+                        f"Only {i + 1} of {len(pages)} pages of this "
+                        f"document were read (memory limit reached)."
+                    )
+
+
+def _run_page_ranges(pool, path, ranges, timeout, ocr_profile):
+    futures = {
+        pool.submit(_extract_page_range, path, start, end, ocr_profile): start
+        for start, end in ranges
+    }
+
+    done, pending = wait(futures, timeout=timeout)
+    if pending:
+        # Only this document's work is dropped: queued ranges are
+        # cancelled, and if any are still running the pool is retired
+        running = [f for f in pending if not f.cancel()]
+        if running:
+            _retire_pool(pool)
+        raise TimeoutError(
+            f"PDF extraction exceeded {timeout}s "
+            f"({len(done)}/{len(futures)} page ranges done)"
+        )
+
+    pages = []
+    for future in sorted(done, key=futures.get):
+        pages.extend(future.result())
+    return pages
+
+
+def _extract_pdf_parallel(data, page_limit, timeout, ocr_profile):
+    """
+    Split pages into contiguous ranges, extract them across the process
+    pool and reassemble in page order.
+    """
+    chunks = min(page_limit, PDF_WORKERS * 2)
+    size = -(-page_limit // chunks)
+    ranges = [
+        (start, min(start + size, page_limit))
+        for start in range(0, page_limit, size)
+    ]
+
+    # Workers read the PDF from a temp file instead of each range
+    # pickling its own copy of the bytes
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        for attempt in range(2):
+            pool = _get_pool()
+            try:
+                return _run_page_ranges(pool, path, ranges, timeout, ocr_profile)
+            except BrokenProcessPool:
+                # Retired under us (another document timed out) or a
+                # worker died; one retry on a fresh pool
+                _retire_pool(pool)
+                if attempt:
+                    raise
+    finally:
+        os.remove(path)
+
+
+def extract_pdf_pages(data, parallel=None, max_pages=PDF_MAX_PAGES,
+                      timeout=PDF_TIMEOUT_SECONDS, ocr_profile="default"):
+    """
+    Extract a PDF given as bytes, page by page. Pages without a usable
+    text layer (scans) are rasterized and OCR'd; ocr_profile=None skips
+    OCR entirely.
+
+    parallel=None picks the process pool automatically for PDFs with at
+    least PARALLEL_MIN_PAGES pages; True / False force a mode.
+
+    Returns [{"page": n, "method": "text" | "ocr" | "ocr_failed",
+    "text": ...}, ...]. Raises ExtractionTruncatedError, with the pages
+    read so far as .pages, if serial extraction hits the memory limit.
+    """
+    page_limit = min(_page_count(data), max_pages)
+
+    if parallel is None:
+        parallel = PDF_WORKERS > 1 and page_limit >= PARALLEL_MIN_PAGES
+
+    if not (parallel and page_limit):
+        pages = []
+        try:
+            for page in iter_pdf_pages(data, page_limit, ocr_profile):
+                pages.append(page)
+        except ExtractionTruncatedError as e:
+            e.pages = pages
+            raise
+        return pages
+
+    results = _extract_pdf_parallel(data, page_limit, timeout, ocr_profile)
+    return [
+        {"page": n + 1, "method": method, "text": text}
+        for n, (text, method) in enumerate(results)
+    ]
+
+
+def extract_pdf_text(data, parallel=None, max_pages=PDF_MAX_PAGES,
+                     timeout=PDF_TIMEOUT_SECONDS, ocr_profile="default"):
+    """
+    Text of a PDF given as bytes; see extract_pdf_pages. On
+    ExtractionTruncatedError, .text holds the text read so far.
+    """
+    try:
+        pages = extract_pdf_pages(
+            data, parallel=parallel, max_pages=max_pages,
+            timeout=timeout, ocr_profile=ocr_profile
+        )
+    except ExtractionTruncatedError as e:
+        e.text = "".join(page["text"] for page in e.pages)
+        raise
+    return "".join(page["text"] for page in pages)
+
+
+def _otsu_threshold(gray):
+    """
+    Otsu's threshold from the grayscale histogram.
+    """
+    histogram = gray.histogram()[:256]
+    total = sum(histogram)
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+
+    sum_bg = weight_bg = 0
+    best_threshold, best_variance = 127, 0.0
+
+    for threshold, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+
+        sum_bg += threshold * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+
+        if variance > best_variance:
+            best_threshold, best_variance = threshold, variance
+
+    return best_threshold
+
+
+def _row_profile_score(image, angle):
+    """
+    Variance of row darkness after rotating by angle. Text lines give
+    sharp peaks when they are horizontal.
+    """
+    rotated = image.rotate(angle, resample=Image.BILINEAR, fillcolor=255)
+    rows = list(rotated.resize((1, rotated.height), Image.BOX).getdata())
+    mean = sum(rows) / len(rows)
+    return sum((r - mean) ** 2 for r in rows)
+
+
+def _estimate_skew(gray):
+    # Search on a small copy; the angle doesn't need full resolution
+    small = gray.copy()
+    small.thumbnail((800, 800))
+
+    steps = int(OCR_DESKEW_MAX_ANGLE / OCR_DESKEW_STEP)
+    angles = [i * OCR_DESKEW_STEP for i in range(-steps, steps + 1)]
+    return max(angles, key=lambda a: _row_profile_score(small, a))
+
+
+def preprocess_image(image, target_dpi=OCR_TARGET_DPI, binarize=True,
+                     deskew=False):
+    """
+    Prepare a photo or scan for Tesseract:
+    EXIF orientation -> grayscale -> downscale -> (deskew) -> binarize.
+
+    Returns (image, timings) where timings maps stage -> milliseconds.
+    """
+    timings = {}
+
+    def stage(name, fn, img):
+        start = time.perf_counter()
+        out = fn(img)
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+        return out
+
+    image = stage("exif", ImageOps.exif_transpose, image)
+    image = stage("grayscale", lambda img: img.convert("L"), image)
+
+    max_width = int(OCR_PAGE_WIDTH_INCHES * target_dpi)
+
+    def downscale(img):
+        if img.width <= max_width:
+            return img
+        height = round(img.height * max_width / img.width)
+        return img.resize((max_width, height), Image.LANCZOS)
+
+    image = stage("downscale", downscale, image)
+
+    if deskew:
+        def rotate(img):
+            angle = _estimate_skew(img)
+            if not angle:
+                return img
+            return img.rotate(
+                angle, resample=Image.BICUBIC, expand=True, fillcolor=255
+            )
+
+        image = stage("deskew", rotate, image)
+
+    if binarize:
+        def threshold(img):
+            cut = _otsu_threshold(img)
+            return img.point(lambda p: 255 if p > cut else 0)
+
+        image = stage("binarize", threshold, image)
+
+    return image, timings
+
+
+class PytesseractEngine:
+    """
+    Runs the tesseract CLI per call: simple, but every call pays for
+    process startup and loading the language model.
+    """
+
+    name = "pytesseract"
+
+    def image_to_string(self, image, profile="default"):
+        return pytesseract.image_to_string(image, config=OCR_PROFILES[profile])
+
+
+class TesserocrPool:
+    """
+    Long-lived tesserocr API handles, reused across calls so the
+    language model is loaded once per handle. At most `size` images
+    are recognized at a time, and at most `size` idle handles are kept
+    per profile. tesserocr releases the GIL while recognizing, so
+    threads sharing the pool run in parallel.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, size=OCR_POOL_SIZE, lang=OCR_LANG):
+        self.size = size
+        self.lang = lang
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = {}   # profile -> [api, ...]
+        self._lock = threading.Lock()
+
+        # Profiles whose API failed to initialise (e.g. no LSTM model in
+        # tessdata) are served by pytesseract instead of failing
+        self._fallback = PytesseractEngine()
+        self._broken = set()
+
+    def _new_api(self, profile):
+        settings = TESSEROCR_PROFILES[profile]
+        api = tesserocr.PyTessBaseAPI(
+            lang=self.lang, psm=settings["psm"], oem=settings["oem"]
+        )
+        for key, value in settings["variables"].items():
+            api.SetVariable(key, value)
+        return api
+
+    def check(self, profile="default"):
+        """
+        Create (and keep) one handle for profile. Raises RuntimeError if
+        Tesseract can't initialise, e.g. tessdata missing or mismatched.
+        """
+        api = self._new_api(profile)
+        with self._lock:
+            self._idle.setdefault(profile, []).append(api)
+
+    def image_to_string(self, image, profile="default"):
+        if profile in self._broken:
+            return self._fallback.image_to_string(image, profile=profile)
+
+        with self._slots:
+            with self._lock:
+                idle = self._idle.setdefault(profile, [])
+                api = idle.pop() if idle else None
+
+            if api is None:
+                try:
+                    api = self._new_api(profile)
+                except RuntimeError as e:
+                    print(f"tesserocr init failed ({profile}), using pytesseract: {e}")
+                    self._broken.add(profile)
+                    return self._fallback.image_to_string(image, profile=profile)
+
+            try:
+                api.SetImage(image)
+                return api.GetUTF8Text()
+            finally:
+                api.Clear()
+                with self._lock:
+                    self._idle[profile].append(api)
+
+    def close(self):
+        with self._lock:
+            for apis in self._idle.values():
+                for api in apis:
+                    api.End()
+            self._idle.clear()
+
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+
+def _make_engine(name):
+    if name == "auto":
+        if tesserocr is None:
+            return PytesseractEngine()
+        pool = TesserocrPool()
+        try:
+            pool.check()
+        except RuntimeError as e:
+            print(f"tesserocr unavailable, using pytesseract: {e}")
+            return PytesseractEngine()
+        return pool
+
+    if name == "tesserocr":
+        if tesserocr is None:
+            raise ImportError("OCR_ENGINE=tesserocr needs the tesserocr package")
+        return TesserocrPool()
+    if name == "pytesseract":
+        return PytesseractEngine()
+    raise ValueError(f"Unknown OCR engine: {name}")
+
+
+def get_ocr_engine():
+    """
+    The process-wide OCR engine picked by OCR_ENGINE. Created lazily,
+    and again after a fork since Tesseract handles must not be shared
+    between processes.
+    """
+    global _engine, _engine_pid
+
+    with _engine_lock:
+        if _engine is None or _engine_pid != os.getpid():
+            _engine = _make_engine(OCR_ENGINE)
+            _engine_pid = os.getpid()
+        return _engine
+
+
+def ocr_image(image, profile="default", preprocess=True, deskew=False):
+    """
+    OCR a PIL image. Returns (text, timings) with per-stage milliseconds.
+    """
+    timings = {}
+
+    if preprocess:
+        image, timings = preprocess_image(image, deskew=deskew)
+
+    start = time.perf_counter()
+    text = get_ocr_engine().image_to_string(image, profile=profile)
+    timings["ocr"] = round((time.perf_counter() - start) * 1000, 2)
+
+    return text, timings
+
+
+def iter_text_from_file(uploaded_file, ocr_profile="default",
+                        memory_limit_mb=PDF_MEMORY_LIMIT_MB,
+                        raise_errors=False):
+    """
+    Like extract_text_from_file, but yields text piece by piece (one
+    page at a time for PDFs) instead of building one string. Joining
+    the pieces gives the unstripped text. Errors, including hitting
+    the memory limit, end the stream; they are printed unless
+    raise_errors is set.
+    """
+    try:
+        if uploaded_file.type == "application/pdf":
+            pages = iter_pdf_pages(
+                uploaded_file.getvalue(), ocr_profile=ocr_profile,
+                memory_limit_mb=memory_limit_mb
+            )
+            for page in pages:
+                yield page["text"]
+
+        elif uploaded_file.type in ["image/png", "image/jpeg", "image/jpg"]:
+            text, _ = ocr_image(Image.open(uploaded_file), profile=ocr_profile)
+            yield text
+
+    except Exception as e:
+        if raise_errors:
+            raise
+        print("Extraction error:", e)
+
+
+def extract_text_from_file(uploaded_file, ocr_profile="default",
+                           raise_errors=False):
+    """
+    Text of an uploaded PDF or image. Errors are printed and give ""
+    unless raise_errors is set. A document cut short by the memory
+    limit gives the text read so far (or, with raise_errors, raises
+    ExtractionTruncatedError carrying it as .text).
+    """
     text = ""
 
     file_type = uploaded_file.type
@@ -11,16 +586,24 @@ def extract_text_from_file(uploaded_file):
     try:
         # PDF
         if file_type == "application/pdf":
-            with pdfplumber.open(uploaded_file) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
+            text = extract_pdf_text(
+                uploaded_file.getvalue(), ocr_profile=ocr_profile
+            )
 
         # Image
         elif file_type in ["image/png", "image/jpeg", "image/jpg"]:
             image = Image.open(uploaded_file)
-            text = pytesseract.image_to_string(image)
+            text, _ = ocr_image(image, profile=ocr_profile)
+
+    except ExtractionTruncatedError as e:
+        if raise_errors:
+            raise
+        print("Extraction warning:", e)
+        text = e.text
 
     except Exception as e:
+        if raise_errors:
+            raise
         print("Extraction error:", e)
 
     return text.strip()
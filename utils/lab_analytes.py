@@ -0,0 +1,260 @@
+import itertools
+import re
+import string
+
+# ===============================
+# ANALYTE DICTIONARY
+# ===============================
+# canonical name -> aliases as printed on lab reports
+ANALYTES = {
+    "HbA1c": ["hb a1c", "hba1c", "glycated haemoglobin", "glycated hemoglobin",
+              "glycosylated hemoglobin"],
+    "Fasting_Glucose": ["blood sugar (fasting)", "fasting blood sugar",
+                        "fasting glucose", "fbs", "glucose fasting",
+                        "plasma glucose fasting"],
+    "Postprandial_Glucose": ["blood sugar (pp)", "post prandial blood sugar",
+                             "ppbs", "glucose pp"],
+    "Random_Glucose": ["random blood sugar", "rbs", "glucose random"],
+    "Creatinine": ["serum creatinine", "creatinine", "s. creatinine"],
+    "Urea": ["blood urea", "urea", "serum urea"],
+    "BUN": ["blood urea nitrogen", "bun"],
+    "Uric_Acid": ["uric acid", "serum uric acid"],
+    "eGFR": ["egfr", "estimated gfr"],
+    "Sodium": ["sodium", "serum sodium", "na+"],
+    "Potassium": ["potassium", "serum potassium", "k+"],
+    "Chloride": ["chloride", "serum chloride"],
+    "Calcium": ["calcium", "serum calcium", "total calcium"],
+    "Phosphorus": ["phosphorus", "serum phosphorus", "phosphate"],
+    "Total_Cholesterol": ["total cholesterol", "cholesterol total",
+                          "serum cholesterol", "cholesterol"],
+    "HDL": ["hdl cholesterol", "hdl", "hdl-c"],
+    "LDL": ["ldl cholesterol", "ldl", "ldl-c"],
+    "VLDL": ["vldl cholesterol", "vldl"],
+    "Triglycerides": ["triglycerides", "triglyceride", "tg"],
+    "TSH": ["tsh", "thyroid stimulating hormone", "tsh ultrasensitive"],
+    "T3": ["t3", "total t3", "triiodothyronine"],
+    "T4": ["t4", "total t4", "thyroxine"],
+    "Free_T3": ["free t3", "ft3"],
+    "Free_T4": ["free t4", "ft4"],
+    "Haemoglobin": ["haemoglobin", "hemoglobin", "hb", "hgb"],
+    "RBC": ["rbc count", "rbc", "red blood cell count", "total rbc count"],
+    "WBC": ["wbc count", "wbc", "total leucocyte count", "tlc",
+            "total wbc count", "white blood cell count"],
+    "Platelets": ["platelet count", "platelets", "plt"],
+    "Haematocrit": ["haematocrit", "hematocrit", "pcv", "hct"],
+    "MCV": ["mcv"],
+    "MCH": ["mch"],
+    "MCHC": ["mchc"],
+    "RDW": ["rdw", "rdw-cv"],
+    "Neutrophils": ["neutrophils", "neutrophil"],
+    "Lymphocytes": ["lymphocytes", "lymphocyte"],
+    "Monocytes": ["monocytes", "monocyte"],
+    "Eosinophils": ["eosinophils", "eosinophil"],
+    "Basophils": ["basophils", "basophil"],
+    "ESR": ["esr", "erythrocyte sedimentation rate"],
+    "CRP": ["crp", "c-reactive protein", "c reactive protein"],
+    "Bilirubin_Total": ["total bilirubin", "bilirubin total",
+                        "serum bilirubin"],
+    "Bilirubin_Direct": ["direct bilirubin", "bilirubin direct",
+                         "conjugated bilirubin"],
+    "SGOT_AST": ["sgot", "ast", "aspartate aminotransferase"],
+    "SGPT_ALT": ["sgpt", "alt", "alanine aminotransferase"],
+    "ALP": ["alkaline phosphatase", "alp"],
+    "GGT": ["ggt", "gamma gt", "gamma glutamyl transferase"],
+    "Total_Protein": ["total protein", "serum protein"],
+    "Albumin": ["albumin", "serum albumin"],
+    "Globulin": ["globulin"],
+    "Vitamin_D": ["vitamin d", "25-oh vitamin d", "25 hydroxy vitamin d",
+                  "vit d"],
+    "Vitamin_B12": ["vitamin b12", "vit b12", "cyanocobalamin"],
+    "Ferritin": ["ferritin", "serum ferritin"],
+    "Iron": ["serum iron", "iron"],
+    "TIBC": ["tibc", "total iron binding capacity"],
+    "PSA": ["psa", "prostate specific antigen"],
+    "INR": ["inr"],
+    "Prothrombin_Time": ["prothrombin time", "pt"],
+}
+
+# Common OCR confusions. Each alias also matches with up to
+# OCR_MAX_EDITS of them applied at separate positions
+OCR_CONFUSIONS = [
+    ("m", "rn"),
+    ("rn", "m"),
+    ("l", "1"),
+    ("o", "0"),
+    ("i", "l"),
+    ("cl", "d"),
+]
+OCR_MAX_EDITS = 2
+
+UNITS = [
+    "mg/dl", "mg/dL", "g/dl", "g/dL", "mmol/l", "mmol/L", "umol/l",
+    "µmol/l", "meq/l", "mEq/L", "u/l", "U/L", "iu/l", "IU/L", "miu/l",
+    "uiu/ml", "µiu/ml", "ng/ml", "ng/dl", "pg/ml", "ug/dl", "µg/dl",
+    "mm/hr", "mm/1st hr", "fl", "fL", "pg", "sec", "seconds",
+    "cells/cumm", "/cumm", "lakhs/cumm", "million/cumm", "10^3/ul",
+    "10^6/ul", "ml/min/1.73m2", "%",
+]
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+_SPACES_RE = re.compile(r"[ \t]+")
+
+# Value (and optional unit) right after a label on the same line;
+# tolerates ":" / "=" / "-" and one short bracketed note in between.
+# Groups: comparator ("<" / ">" / ""), number, unit
+VALUE_RE = re.compile(
+    r"[ \t:=\-]*(?:\([^)\n]{0,30}\)[ \t:=\-]*)?"
+    r"([<>]?)[ \t]*(\d+(?:\.\d+)?)[ \t]*"
+    r"(" + "|".join(
+        re.escape(u) for u in sorted(UNITS, key=len, reverse=True)
+    ) + r")?",
+    re.IGNORECASE
+)
+
+
+def _normalize(text: str) -> str:
+    return _SPACES_RE.sub(" ", text).translate(_ASCII_LOWER).strip()
+
+
+def ocr_variants(alias: str, max_edits: int = OCR_MAX_EDITS) -> set:
+    """
+    alias plus every spelling with 1..max_edits OCR_CONFUSIONS applied
+    at separate, non-overlapping positions, e.g. "cholesterol" ->
+    "cho1esterol", "cholestero1", "cho1estero1", "ch0lestero1", ...
+    """
+    edits = sorted(
+        (start, wrong, right)
+        for wrong, right in OCR_CONFUSIONS
+        for start in range(len(alias))
+        if alias.startswith(wrong, start)
+    )
+
+    variants = {alias}
+    for count in range(1, max_edits + 1):
+        for combo in itertools.combinations(edits, count):
+            if any(a[0] + len(a[1]) > b[0] for a, b in zip(combo, combo[1:])):
+                continue
+            text = alias
+            for start, wrong, right in reversed(combo):
+                text = text[:start] + right + text[start + len(wrong):]
+            variants.add(text)
+    return variants
+
+
+class AnalyteMatcher:
+    """
+    Aho-Corasick automaton over every analyte alias (and its OCR
+    variants). find() locates all labels in one scan of the text and
+    parses the value and unit that follow each one.
+    """
+
+    def __init__(self, analytes: dict = ANALYTES, with_ocr_variants=True):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]   # per state: [(pattern length, canonical)]
+
+        for canonical, aliases in analytes.items():
+            for alias in [canonical.replace("_", " ")] + list(aliases):
+                alias = _normalize(alias)
+                patterns = ocr_variants(alias) if with_ocr_variants else {alias}
+                for pattern in patterns:
+                    self._add(pattern, canonical)
+
+        self._build_links()
+
+    def _add(self, pattern: str, canonical: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+
+        # First analyte to claim a pattern keeps it
+        if not any(length == len(pattern) for length, _ in self._out[state]):
+            self._out[state].append((len(pattern), canonical))
+
+    def _build_links(self):
+        queue = list(self._goto[0].values())
+        head = 0
+
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                if self._fail[nxt] == nxt:
+                    self._fail[nxt] = 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def labels(self, lowered: str) -> list:
+        """
+        All whole-word label matches as (start, end, canonical),
+        leftmost-longest and non-overlapping.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        size = len(lowered)
+        found = []
+        state = 0
+
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            if not out[state]:
+                continue
+
+            end = i + 1
+            if end < size and lowered[end].isalnum():
+                continue
+            for length, canonical in out[state]:
+                start = end - length
+                if start > 0 and lowered[start - 1].isalnum():
+                    continue
+                found.append((start, end, canonical))
+
+        found.sort(key=lambda m: (m[0], m[0] - m[1]))
+
+        matches = []
+        last_end = 0
+        for start, end, canonical in found:
+            if start >= last_end:
+                matches.append((start, end, canonical))
+                last_end = end
+        return matches
+
+    def find(self, text: str) -> dict:
+        """
+        {analyte: (value, unit)} for the first labelled value of each
+        analyte in the text. unit is "" when none is printed.
+        """
+        normalized = _SPACES_RE.sub(" ", text)
+        lowered = normalized.translate(_ASCII_LOWER)
+
+        results = {}
+        for _, end, canonical in self.labels(lowered):
+            if canonical in results:
+                continue
+            match = VALUE_RE.match(normalized, end)
+            if match:
+                comparator, number, unit = match.groups()
+                results[canonical] = (comparator + number, unit or "")
+        return results
+
+
+# Built once at import
+default_matcher = AnalyteMatcher()
+
+
+def extract_lab_results(text: str) -> dict:
+    return default_matcher.find(text)
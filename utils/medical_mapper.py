@@ -1,5 +1,7 @@
 import re
 
+from utils.lab_analytes import extract_lab_results
+
 
 def normalize_spaces(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
@@ -9,67 +11,216 @@ def clean_name_case(name: str) -> str:
     return " ".join(word.capitalize() for word in name.split())
 
 
-def extract_name(text: str) -> str:
-    lines = text.splitlines()
+# ===============================
+# EXTRACTOR REGISTRY
+# ===============================
+# Each extractor is called as fn(lines, i) for every line until it
+# returns a value; the first hit wins. The text is split into lines
+# once and scanned once, so a new field adds no extra pass.
+EXTRACTORS = []
 
-    for line in lines:
-        raw = normalize_spaces(line)
 
-        match = re.match(
-            r"^(Mr|Mrs|Ms)\s*(?:\.\s*)?\s*([A-Za-z]+(?:\s+[A-Za-z]+)*)$",
-            raw,
-            re.IGNORECASE
-        )
+def extractor(field: str):
+    def register(fn):
+        EXTRACTORS.append((field, fn))
+        return fn
+    return register
+
+
+NAME_RE = re.compile(
+    r"^(Mr|Mrs|Ms)\s*(?:\.\s*)?\s*([A-Za-z]+(?:\s+[A-Za-z]+)*)$",
+    re.IGNORECASE
+)
+HBA1C_LABEL_RE = re.compile(r"hb a1c", re.IGNORECASE)
+HBA1C_VALUE_RE = re.compile(r"\b(\d+\.\d+)\s*%")
+FASTING_SUGAR_RE = re.compile(
+    r"BLOOD\s+SUGAR\s*\(\s*FASTING\s*\)\s*([0-9.]+)",
+    re.IGNORECASE
+)
+BLOOD_WORD_RE = re.compile(r"blood", re.IGNORECASE)
+BLOOD_GROUP_RE = re.compile(r"\b(A\+|A-|B\+|B-|AB\+|AB-|O\+|O-)\b")
+
 
-        if match:
-            title = match.group(1).capitalize()
-            name_part = clean_name_case(match.group(2))
-            return f"{title} {name_part}"
+@extractor("Name")
+def _name_from_line(lines: list, i: int) -> str:
+    line = lines[i]
+
+    # Cheap check before normalizing: a title must start the line
+    if line.lstrip()[:1] not in ("M", "m"):
+        return ""
+
+    match = NAME_RE.match(normalize_spaces(line))
+    if match:
+        title = match.group(1).capitalize()
+        name_part = clean_name_case(match.group(2))
+        return f"{title} {name_part}"
 
     return ""
 
 
-def extract_hba1c(text: str) -> str:
-    lines = text.splitlines()
+@extractor("HbA1c")
+def _hba1c_from_line(lines: list, i: int) -> str:
+    if not HBA1C_LABEL_RE.search(lines[i]):
+        return ""
 
-    for i, line in enumerate(lines):
-        if "hb a1c" in line.lower():
-            for j in range(i + 1, min(i + 4, len(lines))):
-                value_match = re.search(r"\b(\d+\.\d+)\s*%", lines[j])
-                if value_match:
-                    return value_match.group(1) + " %"
+    # Value is printed on one of the next three lines
+    for j in range(i + 1, min(i + 4, len(lines))):
+        value_match = HBA1C_VALUE_RE.search(lines[j])
+        if value_match:
+            return value_match.group(1) + " %"
 
     return ""
 
 
-def extract_fasting_sugar(text: str) -> str:
-    match = re.search(
-        r"BLOOD\s+SUGAR\s*\(\s*FASTING\s*\)\s*([0-9.]+)",
-        text,
-        re.IGNORECASE
-    )
-    if match:
+@extractor("Fasting_Sugar")
+def _fasting_sugar_from_line(lines: list, i: int) -> str:
+    line = lines[i]
+    if not BLOOD_WORD_RE.search(line):
+        return ""
+
+    # Label and value may wrap onto the next few non-blank lines
+    end, filled = i + 1, 0
+    while end < len(lines) and filled < 3:
+        if lines[end].strip():
+            filled += 1
+        end += 1
+
+    window = "\n".join(lines[i:end])
+    match = FASTING_SUGAR_RE.search(window)
+    if match and match.start() < len(line):
         return match.group(1) + " mg/dl"
+
     return ""
 
 
+@extractor("Blood_Group")
+def _blood_group_from_line(lines: list, i: int) -> str:
+    match = BLOOD_GROUP_RE.search(lines[i])
+    return match.group(1) if match else ""
+
+
+# Lines kept after the current one when scanning a stream; extractors
+# look at most a few lines ahead
+STREAM_LOOKAHEAD_LINES = 64
+
+
+def _scan(lines: list, stop: int, pending: list, found: dict) -> list:
+    """
+    Run the pending extractors on lines[:stop] (later lines are only
+    lookahead). Returns the extractors still without a value.
+    """
+    for i in range(stop):
+        if not pending:
+            break
+
+        hit = False
+        for field, fn in pending:
+            value = fn(lines, i)
+            if value:
+                found[field] = value
+                hit = True
+
+        if hit:
+            pending = [(f, fn) for f, fn in pending if f not in found]
+
+    return pending
+
+
+def scan_lines(lines: list, extractors: list = EXTRACTORS) -> dict:
+    """
+    Run every extractor over the lines in a single pass.
+    Returns {field: value} in registry order.
+    """
+    found = {}
+    _scan(lines, len(lines), list(extractors), found)
+    return {field: found[field] for field, _ in extractors if field in found}
+
+
+def scan_line_stream(lines, extractors: list = EXTRACTORS,
+                     lookahead: int = STREAM_LOOKAHEAD_LINES) -> dict:
+    """
+    scan_lines over an iterable of lines, holding only a sliding
+    window of 2 * lookahead lines in memory.
+    """
+    found = {}
+    pending = list(extractors)
+    window = []
+
+    for line in lines:
+        window.append(line)
+        if len(window) >= 2 * lookahead:
+            pending = _scan(window, lookahead, pending, found)
+            del window[:lookahead]
+
+    _scan(window, len(window), pending, found)
+    return {field: found[field] for field, _ in extractors if field in found}
+
+
+def iter_line_batches(chunks):
+    """
+    Re-split text arriving in arbitrary chunks (e.g. PDF pages) into
+    lists of complete lines, exactly as "".join(chunks).splitlines()
+    would. A line cut at a chunk boundary is carried to the next batch.
+    """
+    carry = ""
+    for chunk in chunks:
+        pieces = (carry + chunk).splitlines(keepends=True)
+        carry = ""
+        last = pieces[-1] if pieces else ""
+        # Unterminated last line, or a "\r" that may pair with a "\n"
+        if last and (last.splitlines()[0] == last or last.endswith("\r")):
+            carry = pieces.pop()
+        if pieces:
+            yield "".join(pieces).splitlines()
+
+    if carry:
+        yield carry.splitlines()
+
+
+def _extract_field(text: str, field: str) -> str:
+    entries = [(f, fn) for f, fn in EXTRACTORS if f == field]
+    return scan_lines(text.splitlines(), entries).get(field, "")
+
+
+def extract_name(text: str) -> str:
+    return _extract_field(text, "Name")
+
+
+def extract_hba1c(text: str) -> str:
+    return _extract_field(text, "HbA1c")
+
+
+def extract_fasting_sugar(text: str) -> str:
+    return _extract_field(text, "Fasting_Sugar")
+
+
 def map_medical_data(text: str) -> dict:
-    data = {}
+    data = scan_lines(text.splitlines())
 
-    name = extract_name(text)
-    if name:
-        data["Name"] = name
+    lab_results = extract_lab_results(text)
+    if lab_results:
+        data["Lab_Results"] = lab_results
 
-    hba1c = extract_hba1c(text)
-    if hba1c:
-        data["HbA1c"] = hba1c
+    return data
 
-    sugar = extract_fasting_sugar(text)
-    if sugar:
-        data["Fasting_Sugar"] = sugar
 
-    bg_match = re.search(r"\b(A\+|A-|B\+|B-|AB\+|AB-|O\+|O-)\b", text)
-    if bg_match:
-        data["Blood_Group"] = bg_match.group(1)
+def map_medical_data_stream(chunks) -> dict:
+    """
+    map_medical_data over text arriving in pieces, e.g.
+    iter_text_from_file(). Nothing is joined into one string; each
+    batch of lines is matched and dropped.
+    """
+    lab_results = {}
+
+    def lines():
+        for batch in iter_line_batches(chunks):
+            found = extract_lab_results("\n".join(batch))
+            for analyte, value in found.items():
+                lab_results.setdefault(analyte, value)
+            yield from batch
+
+    data = scan_line_stream(lines())
+    if lab_results:
+        data["Lab_Results"] = lab_results
 
     return data
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from utils.pdf_generator import (
+    PDF_LAYOUT_VERSION,
+    generate_medical_pdf,
+    render_values,
+)
+
+# ===============================
+# CACHE CONFIG
+# ===============================
+PDF_CACHE_SIZE = int(os.environ.get("PDF_CACHE_SIZE", 256))   # ~40 KB each
+
+
+def pdf_version_key(patient):
+    """
+    Stable hash of exactly what the PDF shows for this patient. Any
+    profile edit that changes the page changes the key, so stale PDFs
+    are never served; fields the PDF doesn't show don't matter.
+    """
+    payload = json.dumps([PDF_LAYOUT_VERSION] + render_values(patient))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    """
+    Bounded LRU of rendered PDF bytes, shared by every session in
+    this process.
+    """
+
+    def __init__(self, max_entries=PDF_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._pdfs = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            if key in self._pdfs:
+                self._pdfs.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._pdfs[key]
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, pdf):
+        with self._lock:
+            self._pdfs[key] = pdf
+            self._pdfs.move_to_end(key)
+            while len(self._pdfs) > self.max_entries:
+                self._pdfs.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def summary(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._pdfs))
+
+
+# Shared by every Streamlit session served by this process
+pdf_cache = PdfCache()
+
+
+def cached_medical_pdf(patient):
+    """
+    generate_medical_pdf, rendered once per patient profile version.
+    """
+    key = pdf_version_key(patient)
+
+    pdf = pdf_cache.get(key)
+    if pdf is None:
+        pdf = generate_medical_pdf(patient)
+        pdf_cache.put(key, pdf)
+
+    return pdf
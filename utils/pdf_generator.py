@@ -1,56 +1,177 @@
 from fpdf import FPDF
-import tempfile
+from PIL import Image
+from collections import OrderedDict
+import copy
+import io
 import os
-from utils.qr_generator import generate_emergency_qr
+import threading
+import zlib
+from utils.qr_generator import generate_emergency_qr, get_public_link
 
 
 LOGO_PATH = "assets/qure_logo.png"
+WATERMARK_OPACITY = 0.15      # logo is pre-blended onto white
+WATERMARK_KEY = "qure_watermark"
+QR_CACHE_SIZE = 256           # QRs kept decoded for pyfpdf
+
+# Bump when the layout changes, so cached PDFs are not reused
+PDF_LAYOUT_VERSION = 1
+
+
+# ===============================
+# LAYOUT
+# ===============================
+def _field(key, default):
+    return lambda patient: str(patient.get(key, default))
+
+
+def _or_none(key):
+    return lambda patient: str(patient.get(key) or "None")
+
+
+def _yes_no(key):
+    return lambda patient: "YES" if patient.get(key) else "NO"
+
+
+# (title, fill colour, wrap long values, [(label, value getter), ...])
+SECTIONS = [
+    ("PERSONAL INFORMATION", (240, 240, 240), False, [
+        ("Patient ID", _field("Patient_ID", "N/A")),
+        ("Full Name", _field("Name", "N/A")),
+        ("Date of Birth", _field("Date_of_Birth", "N/A")),
+        ("Gender", _field("Gender", "N/A")),
+        ("Blood Group", _field("Blood_Type", "N/A")),
+    ]),
+    ("CRITICAL MEDICAL INFORMATION", (255, 220, 220), True, [
+        ("Current Medications", _or_none("Current_Medications")),
+        ("Drug Allergies", _or_none("Drug_Allergies")),
+        ("Other Allergies", _or_none("Other_Allergies")),
+        ("Medical Devices", _or_none("Medical_Devices")),
+        ("Recent Surgeries", _or_none("Recent_Surgeries")),
+    ]),
+    ("EMERGENCY STATUS", (255, 180, 180), False, [
+        ("Emergency Condition", _field("Emergency_Status", "None")),
+        ("Emergency Contact", _field("Emergency_Contacts", "N/A")),
+        ("Last Vital Signs", _field("Vital_Signs_Last_Recorded", "N/A")),
+        ("DNR Status", _yes_no("DNR_Status")),
+        ("Organ Donor", _yes_no("Organ_Donor")),
+    ]),
+]
+
+WRAP_OVER_CHARS = 50
+
+FOOTER_TEXT = (
+    "Confidential medical information.\n"
+    "Use only for emergency medical care.\n"
+    "Powered by QURE."
+)
+
+
+def render_values(patient):
+    """
+    Every patient-dependent value the renderer writes, in page order.
+    """
+    values = [
+        latin1(value(patient))
+        for _, _, _, fields in SECTIONS
+        for _, value in fields
+    ]
+    values.append(get_public_link(patient.get("Patient_ID", "")))
+    return values
 
 
-def add_watermark(pdf):
+def latin1(text):
     """
-    Add QURE logo watermark at center of page
+    The core PDF fonts are latin-1 only; anything else becomes "?"
+    instead of failing the whole render.
     """
-    if not os.path.exists(LOGO_PATH):
-        return
+    return text.encode("latin-1", "replace").decode("latin-1")
 
-    # Save current position
-    x = pdf.get_x()
-    y = pdf.get_y()
 
-    # Light grey effect (fake opacity)
-    pdf.set_text_color(220, 220, 220)
+def image_info(image):
+    """
+    pyfpdf image entry for a PIL image, so fpdf never has to open or
+    parse an image file.
+    """
+    if image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
 
-    # Center watermark
-    pdf.image(
-        LOGO_PATH,
-        x=55,     # center X
-        y=80,     # center Y
-        w=100     # large but faded look
-    )
+    return {
+        "w": image.width,
+        "h": image.height,
+        "cs": "DeviceGray" if image.mode == "L" else "DeviceRGB",
+        "bpc": 8,
+        "f": "FlateDecode",
+        "data": zlib.compress(image.tobytes()),
+    }
 
-    # Restore cursor
-    pdf.set_xy(x, y)
-    pdf.set_text_color(0, 0, 0)
 
+def faded_logo():
+    """
+    The QURE logo blended onto white at WATERMARK_OPACITY.
+    """
+    logo = Image.open(LOGO_PATH).convert("RGBA")
+    alpha = logo.getchannel("A").point(lambda a: int(a * WATERMARK_OPACITY))
 
-def generate_medical_pdf(patient):
+    faded = Image.new("RGB", logo.size, "white")
+    faded.paste(logo.convert("RGB"), mask=alpha)
+    return faded
+
+
+# ===============================
+# QR CACHE
+# ===============================
+_qr_cache = OrderedDict()
+_qr_lock = threading.Lock()
+
+
+def qr_image_info(patient_id):
     """
-    Generate PDF (used for BOTH emergency & medical view)
+    The patient's QR as a ready pyfpdf image entry.
+
+    generate_emergency_qr already memoizes the PNG; this second cache
+    holds the decoded, re-deflated pixels pyfpdf embeds, which cost
+    about 1.8 ms per QR (more than the rest of a 0.7 ms render). It is
+    keyed on the memoized PNG itself, so a changed public link or QR
+    option gives a new entry. Least recently used entries go first.
     """
+    qr = generate_emergency_qr(patient_id)
+    key = qr.getvalue() if hasattr(qr, "getvalue") else qr
 
+    with _qr_lock:
+        if key in _qr_cache:
+            _qr_cache.move_to_end(key)
+            return _qr_cache[key]
+
+    info = image_info(Image.open(io.BytesIO(key)).convert("L"))
+
+    with _qr_lock:
+        _qr_cache[key] = info
+        while len(_qr_cache) > QR_CACHE_SIZE:
+            _qr_cache.popitem(last=False)
+
+    return info
+
+
+# ===============================
+# PAGE TEMPLATE
+# ===============================
+def _build_template():
+    """
+    Page 1 with everything that is the same for every patient:
+    watermark (decoded and faded once) and the title block.
+    """
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
 
-    # ===============================
-    # WATERMARK (FIRST)
-    # ===============================
-    add_watermark(pdf)
+    # Watermark first, so text draws over it
+    if os.path.exists(LOGO_PATH):
+        info = image_info(faded_logo())
+        info["i"] = len(pdf.images) + 1
+        pdf.images[WATERMARK_KEY] = info
+        pdf.image(WATERMARK_KEY, x=55, y=80, w=100)
 
-    # ===============================
-    # HEADER
-    # ===============================
     pdf.set_font("Arial", "B", 20)
     pdf.set_text_color(200, 0, 0)
     pdf.cell(0, 15, "EMERGENCY MEDICAL PROFILE", ln=True, align="C")
@@ -64,95 +185,66 @@ def generate_medical_pdf(patient):
     pdf.line(10, 35, 200, 35)
     pdf.ln(12)
 
-    # ===============================
-    # PERSONAL INFORMATION
-    # ===============================
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_fill_color(240, 240, 240)
-    pdf.cell(0, 10, "PERSONAL INFORMATION", ln=True, fill=True)
-    pdf.ln(3)
+    return pdf
 
-    personal_info = [
-        ("Patient ID", patient.get("Patient_ID", "N/A")),
-        ("Full Name", patient.get("Name", "N/A")),
-        ("Date of Birth", patient.get("Date_of_Birth", "N/A")),
-        ("Gender", patient.get("Gender", "N/A")),
-        ("Blood Group", patient.get("Blood_Type", "N/A")),
-    ]
 
-    for label, value in personal_info:
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(60, 8, f"{label}:", 0)
-        pdf.set_font("Arial", "", 11)
-        pdf.cell(0, 8, str(value), ln=True)
+_template = None
 
-    pdf.ln(5)
 
-    # ===============================
-    # 🚨 CRITICAL MEDICAL INFORMATION
-    # ===============================
+def _new_document():
+    """
+    Fresh copy of the page template; built once per process.
+    """
+    global _template
+    if _template is None:
+        _template = _build_template()
+    return copy.deepcopy(_template)
+
+
+def _write_section(pdf, title, fill, wrap, fields, patient):
     pdf.set_font("Arial", "B", 14)
-    pdf.set_fill_color(255, 220, 220)
-    pdf.cell(0, 10, "CRITICAL MEDICAL INFORMATION", ln=True, fill=True)
+    pdf.set_fill_color(*fill)
+    pdf.cell(0, 10, title, ln=True, fill=True)
     pdf.ln(3)
 
-    critical_medical = [
-        ("Current Medications", patient.get("Current_Medications", "None")),
-        ("Drug Allergies", patient.get("Drug_Allergies", "None")),
-        ("Other Allergies", patient.get("Other_Allergies", "None")),
-        ("Medical Devices", patient.get("Medical_Devices", "None")),
-        ("Recent Surgeries", patient.get("Recent_Surgeries", "None")),
-    ]
+    for label, value in fields:
+        text = latin1(value(patient))
 
-    for label, value in critical_medical:
         pdf.set_font("Arial", "B", 11)
         pdf.cell(60, 8, f"{label}:", 0)
         pdf.set_font("Arial", "", 11)
 
-        text = str(value) if value else "None"
-        if len(text) > 50:
+        if wrap and len(text) > WRAP_OVER_CHARS:
             pdf.ln(8)
             pdf.multi_cell(0, 6, text)
         else:
             pdf.cell(0, 8, text, ln=True)
 
-    pdf.ln(5)
 
-    # ===============================
-    # 🚑 EMERGENCY STATUS
-    # ===============================
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_fill_color(255, 180, 180)
-    pdf.cell(0, 10, "EMERGENCY STATUS", ln=True, fill=True)
-    pdf.ln(3)
+def generate_medical_pdf(patient):
+    """
+    Generate PDF (used for BOTH emergency & medical view)
+    """
 
-    emergency_info = [
-        ("Emergency Condition", patient.get("Emergency_Status", "None")),
-        ("Emergency Contact", patient.get("Emergency_Contacts", "N/A")),
-        ("Last Vital Signs", patient.get("Vital_Signs_Last_Recorded", "N/A")),
-        ("DNR Status", "YES" if patient.get("DNR_Status") else "NO"),
-        ("Organ Donor", "YES" if patient.get("Organ_Donor") else "NO"),
-    ]
+    pdf = _new_document()
 
-    for label, value in emergency_info:
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(60, 8, f"{label}:", 0)
-        pdf.set_font("Arial", "", 11)
-        pdf.cell(0, 8, str(value), ln=True)
+    # ===============================
+    # PATIENT SECTIONS
+    # ===============================
+    for n, (title, fill, wrap, fields) in enumerate(SECTIONS):
+        if n:
+            pdf.ln(5)
+        _write_section(pdf, title, fill, wrap, fields, patient)
 
     # ===============================
     # QR CODE (BOTTOM RIGHT)
     # ===============================
     try:
-        qr = generate_emergency_qr(patient.get("Patient_ID", ""))
-        qr_bytes = qr.getvalue() if hasattr(qr, "getvalue") else qr
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-            tmp.write(qr_bytes)
-            path = tmp.name
-
-        pdf.image(path, x=155, y=230, w=40)
-        os.remove(path)
+        # fpdf drops the data of every image it writes, so it gets a copy
+        info = dict(qr_image_info(patient.get("Patient_ID", "")))
+        info["i"] = len(pdf.images) + 1
+        pdf.images["qr"] = info
+        pdf.image("qr", x=155, y=230, w=40)
 
     except Exception as e:
         print("QR error:", e)
@@ -163,12 +255,6 @@ def generate_medical_pdf(patient):
     pdf.ln(10)
     pdf.set_font("Arial", "I", 9)
     pdf.set_text_color(120, 120, 120)
-    pdf.multi_cell(
-        0,
-        5,
-        "⚠️ Confidential medical information.\n"
-        "Use only for emergency medical care.\n"
-        "Powered by QURE.",
-    )
+    pdf.multi_cell(0, 5, FOOTER_TEXT)
 
     return pdf.output(dest="S").encode("latin1")
@@ -1,170 +1,172 @@
-from fpdf import FPDF
-import tempfile
+import io
 import os
-from utils.qr_generator import generate_emergency_qr
-
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+import qrcode
+import qrcode.image.svg
+from qrcode.constants import (
+    ERROR_CORRECT_H,
+    ERROR_CORRECT_L,
+    ERROR_CORRECT_M,
+    ERROR_CORRECT_Q,
+)
 
 # ===============================
-# SAFE VALUE HANDLER (CRITICAL)
+# QR CONFIG
 # ===============================
-def safe(value, fallback="N/A"):
+# Same public page the backend and PWA encode in their QR codes
+PUBLIC_BASE_URL = os.environ.get(
+    "PUBLIC_BASE_URL", "https://qure-jet.vercel.app/public.html"
+)
+
+# L ~7%, M ~15%, Q ~25%, H ~30% of the code can be damaged and still scan
+ERROR_CORRECTION = {
+    "L": ERROR_CORRECT_L,
+    "M": ERROR_CORRECT_M,
+    "Q": ERROR_CORRECT_Q,
+    "H": ERROR_CORRECT_H,
+}
+FORMATS = ["png", "svg"]
+
+DEFAULT_ERROR_CORRECTION = "M"
+DEFAULT_BOX_SIZE = 10          # pixels per module
+DEFAULT_BORDER = 4             # quiet zone in modules (spec minimum)
+
+QR_CACHE_SIZE = 1024
+BATCH_CHUNK_SIZE = 256
+
+
+def get_public_link(patient_id):
+    """
+    Public emergency page for a patient (what the QR encodes).
+    """
+    return f"{PUBLIC_BASE_URL}?patient_id={quote(str(patient_id))}"
+
+
+def render_qr(data, fmt="png", error_correction=DEFAULT_ERROR_CORRECTION,
+              box_size=DEFAULT_BOX_SIZE, border=DEFAULT_BORDER):
     """
-    Convert empty, None, or whitespace-only values
-    into a safe medical fallback.
+    Encode data as a QR code. Returns PNG or SVG bytes.
     """
-    if value is None:
-        return fallback
-    if isinstance(value, str) and value.strip() == "":
-        return fallback
-    return str(value)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown QR format: {fmt}")
+
+    qr = qrcode.QRCode(
+        error_correction=ERROR_CORRECTION[error_correction],
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    if fmt == "svg":
+        image = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    else:
+        image = qr.make_image(fill_color="black", back_color="white")
+
+    buffer = io.BytesIO()
+    image.save(buffer)
+    return buffer.getvalue()
 
 
 # ===============================
-# PDF GENERATOR
+# MEMOIZED PER-PATIENT QR
 # ===============================
-def generate_medical_pdf(patient):
-    """
-    Generate complete emergency medical PDF.
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0}
 
-    Args:
-        patient (dict): Patient data from database
 
-    Returns:
-        bytes: PDF file bytes
+def generate_emergency_qr(patient_id, fmt="png",
+                          error_correction=DEFAULT_ERROR_CORRECTION,
+                          box_size=DEFAULT_BOX_SIZE, border=DEFAULT_BORDER):
+    """
+    QR code (PNG or SVG bytes) for the patient's public emergency link.
+    Memoized per patient and options; the link is part of the key, so
+    changing PUBLIC_BASE_URL never serves an old code.
     """
+    link = get_public_link(patient_id)
+    key = (link, fmt, error_correction, box_size, border)
 
-    pdf = FPDF()
-    pdf.add_page()
-
-    # ===============================
-    # HEADER
-    # ===============================
-    pdf.set_font("Arial", "B", 20)
-    pdf.set_text_color(200, 0, 0)
-    pdf.cell(0, 15, "EMERGENCY MEDICAL PROFILE", ln=True, align="C")
-
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_font("Arial", "I", 10)
-    pdf.cell(0, 6, "For Emergency Use Only", ln=True, align="C")
-
-    pdf.set_draw_color(200, 0, 0)
-    pdf.set_line_width(0.5)
-    pdf.line(10, 35, 200, 35)
-
-    pdf.ln(15)
-
-    # ===============================
-    # PERSONAL INFORMATION
-    # ===============================
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_fill_color(240, 240, 240)
-    pdf.cell(0, 10, "PERSONAL INFORMATION", ln=True, fill=True)
-    pdf.ln(2)
-
-    personal_fields = [
-        ("Patient ID", safe(patient.get("Patient_ID"))),
-        ("Full Name", safe(patient.get("Name"))),
-        ("Date of Birth", safe(patient.get("Date_of_Birth"))),
-        ("Gender", safe(patient.get("Gender"))),
-        ("Blood Type", safe(patient.get("Blood_Type"))),
-    ]
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            cache_stats["hits"] += 1
+            return _cache[key]
+        cache_stats["misses"] += 1
+
+    image = render_qr(link, fmt, error_correction, box_size, border)
+
+    with _cache_lock:
+        _cache[key] = image
+        while len(_cache) > QR_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return image
 
-    for label, value in personal_fields:
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(60, 8, f"{label}:", 0)
-        pdf.set_font("Arial", "", 11)
-        pdf.cell(0, 8, value, ln=True)
-
-    pdf.ln(5)
-
-    # ===============================
-    # MEDICAL INFORMATION
-    # ===============================
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_fill_color(240, 240, 240)
-    pdf.cell(0, 10, "MEDICAL INFORMATION", ln=True, fill=True)
-    pdf.ln(2)
-
-    medical_fields = [
-        ("Current Medications", safe(patient.get("Current_Medications"))),
-        ("Drug Allergies", safe(patient.get("Drug_Allergies"))),
-        ("Other Allergies", safe(patient.get("Other_Allergies"))),
-        ("Recent Surgeries", safe(patient.get("Recent_Surgeries"))),
-        ("Medical Devices", safe(patient.get("Medical_Devices"))),
+
+# ===============================
+# BATCH
+# ===============================
+def _render_chunk(patient_ids, options):
+    return [
+        render_qr(get_public_link(pid), **options)
+        for pid in patient_ids
     ]
 
-    for label, value in medical_fields:
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(60, 8, f"{label}:", 0)
-        pdf.set_font("Arial", "", 11)
-
-        if len(value) > 50:
-            pdf.ln(8)
-            pdf.multi_cell(0, 6, value)
-        else:
-            pdf.cell(0, 8, value, ln=True)
-
-    pdf.ln(5)
-
-    # ===============================
-    # EMERGENCY INFORMATION
-    # ===============================
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_fill_color(255, 220, 220)
-    pdf.cell(0, 10, "EMERGENCY INFORMATION", ln=True, fill=True)
-    pdf.ln(2)
-
-    emergency_fields = [
-        ("Emergency Status", safe(patient.get("Emergency_Status"))),
-        ("Emergency Contact", safe(patient.get("Emergency_Contacts"))),
-        ("Vital Signs (Last)", safe(patient.get("Vital_Signs_Last_Recorded"))),
-        ("DNR Status", "Yes" if patient.get("DNR_Status") else "No"),
-        ("Organ Donor", "Yes" if patient.get("Organ_Donor") else "No"),
+
+def generate_qr_batch(patient_ids, fmt="png",
+                      error_correction=DEFAULT_ERROR_CORRECTION,
+                      box_size=DEFAULT_BOX_SIZE, border=DEFAULT_BORDER,
+                      workers=None):
+    """
+    QR codes for many patients across a process pool.
+    Returns {patient_id: bytes}. Bypasses the per-patient cache, which
+    is sized for interactive use, not bulk exports.
+    """
+    patient_ids = list(patient_ids)
+    workers = workers or os.cpu_count() or 1
+    options = {
+        "fmt": fmt,
+        "error_correction": error_correction,
+        "box_size": box_size,
+        "border": border,
+    }
+
+    chunks = [
+        patient_ids[i:i + BATCH_CHUNK_SIZE]
+        for i in range(0, len(patient_ids), BATCH_CHUNK_SIZE)
     ]
 
-    for label, value in emergency_fields:
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(60, 8, f"{label}:", 0)
-        pdf.set_font("Arial", "", 11)
-        pdf.cell(0, 8, value, ln=True)
-
-    # ===============================
-    # QR CODE (SAFE HANDLING)
-    # ===============================
-    try:
-        qr_obj = generate_emergency_qr(patient.get("Patient_ID", ""))
-
-        # BytesIO safe handling
-        if hasattr(qr_obj, "getvalue"):
-            qr_bytes = qr_obj.getvalue()
-        else:
-            qr_bytes = qr_obj
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-            tmp.write(qr_bytes)
-            temp_path = tmp.name
-
-        pdf.image(temp_path, x=155, y=45, w=40)
-        os.remove(temp_path)
-
-    except Exception as e:
-        print("⚠️ QR code not added:", e)
-
-    # ===============================
-    # FOOTER
-    # ===============================
-    pdf.ln(10)
-    pdf.set_font("Arial", "I", 9)
-    pdf.set_text_color(100, 100, 100)
-    pdf.multi_cell(
-        0,
-        5,
-        "This document contains confidential medical information.\n"
-        "Use only for emergency medical care.\n"
-        "Scan the QR code for real-time digital access.",
-    )
+    if workers == 1 or len(chunks) <= 1:
+        images = [_render_chunk(chunk, options) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            images = list(pool.map(
+                _render_chunk, chunks, [options] * len(chunks)
+            ))
+
+    return {
+        pid: image
+        for chunk, chunk_images in zip(chunks, images)
+        for pid, image in zip(chunk, chunk_images)
+    }
 
-    # ===============================
-    # RETURN PDF
-    # ===============================
-    return pdf.output(dest="S").encode("latin1")
+
+def get_nfc_instructions():
+    """
+    Markdown help for putting the emergency link on an NFC tag.
+    """
+    return (
+        "**📱 Add your emergency link to an NFC tag**\n\n"
+        "1. Install an NFC writer app (e.g. *NFC Tools*) on your phone.\n"
+        "2. Choose **Write → Add a record → URL**.\n"
+        "3. Paste the emergency link shown above.\n"
+        "4. Hold the tag to the back of your phone to write it.\n"
+        "5. Stick the tag on your phone case, wallet or ID card.\n\n"
+        "Anyone who taps the tag with a phone opens your emergency "
+        "profile, no app needed."
+    )
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# ===============================
+# CLIENT CONFIG
+# ===============================
+RECORDS_TIMEOUT = float(os.environ.get("RECORDS_TIMEOUT", 10))
+RECORDS_FETCH_WORKERS = int(os.environ.get("RECORDS_FETCH_WORKERS", 8))
+RECORDS_BATCH_MAX = 200    # backend limit on patient_ids per batch call
+
+
+class RecordsClient:
+    """
+    Medical-record metadata for a page of patients.
+
+    Uses POST {api_records}/batch (one round-trip per page). If the
+    backend doesn't have it yet, falls back to the per-patient endpoint
+    with at most `workers` requests in flight.
+    """
+
+    def __init__(self, api_records, headers=None, workers=RECORDS_FETCH_WORKERS,
+                 timeout=RECORDS_TIMEOUT):
+        self.api_records = api_records
+        self.headers = headers or {}
+        self.workers = workers
+        self.timeout = timeout
+
+        # None = not tried yet; False after a 404/405 so later pages skip it
+        self.batch_supported = None
+        self._session = threading.local()
+
+    def _http(self):
+        # requests.Session isn't thread-safe, so one per worker thread
+        session = getattr(self._session, "value", None)
+        if session is None:
+            session = self._session.value = requests.Session()
+            session.headers.update(self.headers)
+        return session
+
+    def _fetch_batch(self, pids):
+        r = self._http().post(
+            f"{self.api_records}/batch",
+            json={"patient_ids": pids},
+            timeout=self.timeout
+        )
+        if r.status_code in (404, 405):
+            self.batch_supported = False
+            return None
+        r.raise_for_status()
+        self.batch_supported = True
+        return r.json()["records"]
+
+    def _fetch_one(self, pid):
+        try:
+            r = self._http().get(f"{self.api_records}/{pid}", timeout=self.timeout)
+            r.raise_for_status()
+            return r.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Records fetch error ({pid}): {e}")
+            return None
+
+    def fetch(self, pids):
+        """
+        Returns (records, stats). records maps each patient ID to its
+        list of records, or None if that patient's fetch failed. stats
+        has mode, round_trips and seconds.
+        """
+        pids = list(dict.fromkeys(p for p in pids if p))
+        start = time.perf_counter()
+        round_trips = 0
+
+        if not pids:
+            return {}, {"mode": "none", "round_trips": 0, "seconds": 0.0}
+
+        if self.batch_supported is not False:
+            records = {}
+            try:
+                for i in range(0, len(pids), RECORDS_BATCH_MAX):
+                    round_trips += 1
+                    batch = self._fetch_batch(pids[i:i + RECORDS_BATCH_MAX])
+                    if batch is None:
+                        records = None
+                        break
+                    records.update(batch)
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                print(f"Batch records fetch error: {e}")
+                records = None
+
+            if records is not None:
+                return (
+                    {pid: records.get(pid, []) for pid in pids},
+                    {"mode": "batch", "round_trips": round_trips,
+                     "seconds": time.perf_counter() - start}
+                )
+
+        # Threads (and their sessions) last one fetch, so a client kept
+        # in session_state never holds idle threads between pages
+        with ThreadPoolExecutor(
+            max_workers=min(self.workers, len(pids)),
+            thread_name_prefix="records"
+        ) as pool:
+            records = dict(zip(pids, pool.map(self._fetch_one, pids)))
+        round_trips += len(pids)
+
+        return records, {
+            "mode": "concurrent",
+            "round_trips": round_trips,
+            "seconds": time.perf_counter() - start
+        }